@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import multiprocessing as mproc
+
+import cv2 as cv
+
+import handModule as hm
+from detectorpool import warmUp
+
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+# One HandDetector per worker process, created by _initWorker().
+_detector = None
+
+
+def findVideos(path):
+    """findVideos()
+
+    Args:
+        path:   a video file or a directory of video files
+    Returns:
+        list: sorted paths of the videos to process
+    """
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(VIDEO_EXTENSIONS)
+        )
+
+    return [path]
+
+
+def videoChunks(path, chunkSize = 300):
+    """videoChunks()
+
+    Args:
+        path:       a video file
+        chunkSize:  number of frames per chunk, None reads the video in one piece
+    Returns:
+        list: (path, first frame, end frame) of every chunk of the video. The
+              end is None when the frame count is unknown, the video is then
+              read sequentially in one chunk.
+    """
+    capture = cv.VideoCapture(path)
+    frames = int(capture.get(cv.CAP_PROP_FRAME_COUNT))
+    capture.release()
+
+    if frames <= 0 or not chunkSize:
+        return [(path, 0, None)]
+
+    return [(path, start, min(start + chunkSize, frames)) for start in range(0, frames, chunkSize)]
+
+
+def _initWorker(detectorArgs):
+    global _detector
+    _detector = hm.HandDetector(**detectorArgs)
+
+    # Load the model before the first chunk arrives.
+    warmUp(_detector)
+
+
+def _processChunk(chunk):
+    path, start, end = chunk
+
+    # Tracking mode carries state over from the previous frame, which belongs to
+    # another chunk here, so every chunk starts with a fresh detection.
+    _detector.reset()
+
+    capture = cv.VideoCapture(path)
+    if start:
+        capture.set(cv.CAP_PROP_POS_FRAMES, start)
+
+        # Backends that can't seek stay where they are, read up to start then.
+        if int(capture.get(cv.CAP_PROP_POS_FRAMES)) != start:
+            capture.release()
+            capture = cv.VideoCapture(path)
+            for _ in range(start):
+                if not capture.grab():
+                    break
+
+    ret = []
+    while end is None or start + len(ret) < end:
+        success, frame = capture.read()
+        if not success:
+            break
+
+        _detector.setResults(_detector.process(frame))
+        ret.append((_detector.landmarks, _detector.handedness))
+
+    capture.release()
+    return chunk, ret
+
+
+def processVideos(paths, workers = None, chunkSize = 300, **detectorArgs):
+    """processVideos()
+
+    Processes recorded videos as fast as the CPU allows by splitting them
+    into chunks across a process pool, with one HandDetector per worker.
+
+    Args:
+        paths:          list of video files, see findVideos()
+        workers:        number of worker processes, defaults to the CPU count
+        chunkSize:      number of frames per chunk, None reads every video in one piece
+        detectorArgs:   passed on to HandDetector()
+    Returns:
+        dict: for each path, a list with (landmarks, handedness) of every
+              frame in frame order, see HandDetector.setLandmarks()
+    Raises:
+        RuntimeError: a chunk read fewer frames than it should while later
+                      ones still had frames, so frames would be missing
+    """
+    chunks = [chunk for path in paths for chunk in videoChunks(path, chunkSize)]
+    ret = {path: [] for path in paths}
+
+    with mproc.Pool(workers, _initWorker, (detectorArgs,)) as pool:
+        # imap keeps the chunk order, so results can simply be appended.
+        for (path, start, end), frames in pool.imap(_processChunk, chunks):
+            # The frame count is only an estimate, so the last chunks may come
+            # up short. A short chunk followed by frames is a gap though.
+            if frames and len(ret[path]) != start:
+                raise RuntimeError(path + ": frames " + str(len(ret[path])) + " to " + str(start) + " could not be read, "
+                                   "the frame count or seeking is off, try chunkSize = None")
+            ret[path].extend(frames)
+
+    return ret
+
+
+# ----------------------------- Main
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python batch.py <video or directory> [workers] [chunk size, 0 reads videos whole]")
+        return
+
+    paths = findVideos(sys.argv[1])
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    chunkSize = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+    chunkSize = chunkSize or None
+
+    start = time.time()
+    results = processVideos(paths, workers, chunkSize)
+    elapsed = time.time() - start
+
+    total = 0
+    for path, frames in results.items():
+        withHands = sum(1 for landmarks, handedness in frames if len(landmarks))
+        total += len(frames)
+        print(path + ": " + str(len(frames)) + " frames, " + str(withHands) + " with hands")
+
+    print("Processed " + str(total) + " frames in " + str(round(elapsed, 2)) + "s (" + str(int(total / max(elapsed, 1e-9))) + " fps)")
+
+if __name__ == "__main__":
+    main()
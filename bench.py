@@ -0,0 +1,281 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+import handModule as hm
+import replay as rp
+
+
+RESOLUTIONS = [(640, 480), (1280, 920), (1920, 1080)]
+HAND_COUNTS = [1, 2, 4]
+
+# Gesture methods timed on replayed landmarks, with their arguments after img.
+GESTURE_METHODS = [
+    ("findPosition", (2,)),
+    ("center_of_mass", ()),
+    ("palm_center", ()),
+    ("fingerCount", ()),
+    ("checkGrab", ()),
+    ("checkGrabAlt", ()),
+    ("checkGrabCnt", ()),
+    ("swipeDirection", ()),
+]
+
+
+def summarize(times):
+    """summarize()
+
+    Args:
+        times:  list of call durations in seconds
+    Returns:
+        dict: p50/p95/p99/mean latency in milliseconds and calls per second
+    """
+    ms = np.array(times) * 1000
+    if len(ms) == 0:
+        return {"runs": 0}
+
+    return {
+        "runs": len(ms),
+        "p50": float(np.percentile(ms, 50)),
+        "p95": float(np.percentile(ms, 95)),
+        "p99": float(np.percentile(ms, 99)),
+        "mean": float(ms.mean()),
+        "throughput": float(1000 / ms.mean()) if ms.mean() > 0 else float("inf"),
+    }
+
+
+def benchGestures(source, width, height):
+    """benchGestures()
+
+    Times each gesture method separately over every frame of source. The
+    landmarks are set before each call, so per-frame caches start cold.
+
+    Args:
+        source:     ArraySource or RecordingSource
+        width:      image width the methods work in
+        height:     image height
+    Returns:
+        dict: summarize() result of each method
+    """
+    detector = hm.HandDetector(source = [])
+    img = rp.frame(width, height)
+
+    ret = {}
+    for name, args in GESTURE_METHODS:
+        method = getattr(detector, name)
+        detector.reset()
+
+        times = []
+        for ind in rp.replay(detector, source):
+            if len(detector.landmarks) == 0:
+                continue
+
+            start = time.perf_counter()
+            method(img, *args)
+            times.append(time.perf_counter() - start)
+
+        ret[name] = summarize(times)
+
+    return ret
+
+
+def benchFindHands(width, height, frames, seed = 0):
+    """benchFindHands()
+
+    Times BGR to RGB conversion and findHands() (conversion plus inference)
+    on random frames. Needs Mediapipe.
+
+    Args:
+        width:  frame width
+        height: frame height
+        frames: number of frames to time
+        seed:   seed for the random frames
+    Returns:
+        dict: summarize() result of cvtColor and findHands
+    """
+    import cv2 as cv
+
+    rng = np.random.default_rng(seed)
+    images = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(min(frames, 8))]
+    detector = hm.HandDetector()
+
+    convert = []
+    find = []
+    for ind in range(frames):
+        img = images[ind % len(images)]
+
+        start = time.perf_counter()
+        cv.cvtColor(img, cv.COLOR_BGR2RGB)
+        convert.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        detector.findHands(img, draw = False)
+        find.append(time.perf_counter() - start)
+
+    return {"cvtColor": summarize(convert), "findHands": summarize(find)}
+
+
+def benchAllocations(width, height, inference = False, frames = 100):
+    """benchAllocations()
+
+    Measures the bytes allocated per frame by capture into a FramePool and
+    color conversion (plus findHands() with inference), which should be 0
+    in the steady state apart from Mediapipe's own allocations.
+
+    Args:
+        width:      frame width
+        height:     frame height
+        inference:  run findHands() instead of only the color conversion
+        frames:     frames to measure
+    Returns:
+        dict: allocationsPerFrame() result
+    """
+    from framepool import FramePool, allocationsPerFrame
+    from multistream import SyntheticSource
+
+    source = SyntheticSource(width, height, fps = None)
+    pool = FramePool(1)
+    detector = hm.HandDetector() if inference else hm.HandDetector(source = [])
+
+    def step():
+        success, frame = pool.read(source)
+        if inference:
+            detector.findHands(frame, draw = False)
+        else:
+            detector.toRGB(frame)
+        pool.release(frame)
+
+    return allocationsPerFrame(step, frames)
+
+
+def benchStartup(width, height):
+    """benchStartup()
+
+    Compares a cold start (import, model load, first frame) with taking a
+    detector from a warm DetectorPool. Needs Mediapipe.
+
+    Args:
+        width:  frame width
+        height: frame height
+    Returns:
+        dict: measureStartup() result of both
+    """
+    from detectorpool import DetectorPool, measureStartup
+
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    cold = measureStartup(frame)
+    pool = DetectorPool(1, frame.shape)
+
+    return {"cold": cold, "pooled": measureStartup(frame, pool), "poolLoad": pool.loadTime}
+
+
+def run(resolutions = RESOLUTIONS, handCounts = HAND_COUNTS, frames = 2000, recording = None, inference = False, allocations = False, startup = False):
+    """run()
+
+    Args:
+        resolutions:    list of (width, height)
+        handCounts:     hands per frame for the synthetic landmarks
+        frames:         frames per synthetic run
+        recording:      optional recording.LandmarkRecorder file to replay as well
+        inference:      also time findHands() with Mediapipe
+        allocations:    also measure bytes allocated per frame on the frame path
+        startup:        also measure cold vs pooled start to the first landmarks
+    Returns:
+        dict: machine-readable results, one entry per run
+    """
+    import cv2 as cv
+
+    results = []
+    if startup:
+        width, height = resolutions[0]
+        results.append({
+            "source": "startup",
+            "width": width,
+            "height": height,
+            "startup": benchStartup(width, height),
+        })
+
+    for width, height in resolutions:
+        for hands in handCounts:
+            results.append({
+                "source": "synthetic",
+                "width": width,
+                "height": height,
+                "hands": hands,
+                "methods": benchGestures(rp.syntheticHands(frames, hands), width, height),
+            })
+
+        if recording is not None:
+            results.append({
+                "source": recording,
+                "width": width,
+                "height": height,
+                "methods": benchGestures(rp.RecordingSource(recording), width, height),
+            })
+
+        if inference:
+            results.append({
+                "source": "random frames",
+                "width": width,
+                "height": height,
+                "methods": benchFindHands(width, height, min(frames, 200)),
+            })
+
+        if allocations:
+            results.append({
+                "source": "synthetic frames",
+                "width": width,
+                "height": height,
+                "allocations": benchAllocations(width, height, inference),
+            })
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv.__version__,
+        "machine": platform.machine(),
+        "time": time.time(),
+        "results": results,
+    }
+
+
+def parseResolutions(text):
+    return [tuple(int(v) for v in res.split("x")) for res in text.split(",")]
+
+
+# ----------------------------- Main
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmarks the HandDetector hot paths.")
+    parser.add_argument("--resolutions", default = "640x480,1280x920,1920x1080", help = "comma separated WIDTHxHEIGHT list")
+    parser.add_argument("--hands", default = "1,2,4", help = "comma separated hand counts")
+    parser.add_argument("--frames", type = int, default = 2000, help = "frames per run")
+    parser.add_argument("--recording", help = "landmark recording to replay as well")
+    parser.add_argument("--inference", action = "store_true", help = "also time findHands() with Mediapipe")
+    parser.add_argument("--allocations", action = "store_true", help = "also measure allocations per frame")
+    parser.add_argument("--startup", action = "store_true", help = "also measure cold vs pooled start")
+    parser.add_argument("--output", help = "write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = run(
+        parseResolutions(args.resolutions),
+        [int(v) for v in args.hands.split(",")],
+        args.frames,
+        args.recording,
+        args.inference,
+        args.allocations,
+        args.startup
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent = 2)
+    else:
+        json.dump(report, sys.stdout, indent = 2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import handModule as hm
+from events import GrabStart, GrabEnd, Swipe, FingerCountChanged
+from recording import HANDEDNESS_CODES, HANDEDNESS_LABELS
+from trajectory import Gesture
+
+
+# Shared memory layout:
+#   header:     magic (4s), version (u2), maxHands (u2), frameSlots (u4), eventSlots (u4), padded to 64 bytes
+#   counters:   frames written (u8), events written (u8), padded to 64 bytes
+#   frames:     frameSlots records, see frameDtype()
+#   events:     eventSlots records, see EVENT_DTYPE
+# Both rings are overwritten oldest first. Every record starts with a sequence
+# number (seqlock): odd while the server writes it, 2 * (n + 1) once record n
+# is complete, so readers can tell a torn or overwritten record.
+MAGIC = b"HLMB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+HEADER_SIZE = 64
+COUNTERS_SIZE = 64
+
+EVENT_DTYPE = np.dtype([
+    ("seq", "<u8"),
+    ("kind", "u1"),
+    ("timestamp", "<f8"),
+    ("hand", "<U8"),
+    ("position", "<f8", 2),
+    ("direction", "<U16"),
+    ("gesture", "<U10"),
+    ("velocity", "<f8"),
+    ("confidence", "<f8"),
+    ("count", "<i4"),
+    ("previous", "<i4"),
+])
+
+# Event types carried on the bus, by their kind code.
+EVENT_KINDS = {GrabStart: 1, GrabEnd: 2, Swipe: 3, FingerCountChanged: 4, Gesture: 5}
+
+
+def frameDtype(maxHands):
+    """frameDtype()
+
+    Args:
+        maxHands:   number of hand slots per record
+    Returns:
+        np.dtype: the structured dtype of one frame record, a
+                  recording.recordDtype() record with a sequence number and hand IDs
+    """
+    return np.dtype([
+        ("seq", "<u8"),
+        ("timestamp", "<f8"),
+        ("hands", "u1"),
+        ("handedness", "u1", (maxHands,)),
+        ("ids", "<i8", (maxHands,)),
+        ("landmarks", "<f4", (maxHands, hm.NUM_LANDMARKS, 3)),
+    ])
+
+
+def _layout(buf, maxHands, frameSlots, eventSlots):
+    # Numpy views of the counters and both rings, no copies.
+    frames = frameDtype(maxHands)
+    framesAt = HEADER_SIZE + COUNTERS_SIZE
+    eventsAt = framesAt + frames.itemsize * frameSlots
+
+    return (
+        np.ndarray(2, dtype="<u8", buffer=buf, offset=HEADER_SIZE),
+        np.ndarray(frameSlots, dtype=frames, buffer=buf, offset=framesAt),
+        np.ndarray(eventSlots, dtype=EVENT_DTYPE, buffer=buf, offset=eventsAt),
+    )
+
+
+def busSize(maxHands, frameSlots, eventSlots):
+    """Bytes of shared memory a bus needs."""
+    return HEADER_SIZE + COUNTERS_SIZE + frameDtype(maxHands).itemsize * frameSlots + EVENT_DTYPE.itemsize * eventSlots
+
+
+class BusWriter():
+    """BusWriter()
+
+    Publishes landmarks and gesture events into a named shared memory block
+    that any number of local BusReaders map without copying. There is one
+    writer per bus, it never waits for readers.
+
+    Args:
+        name:       shared memory name readers attach to
+        maxHands:   hand slots per frame, extra hands are not published
+        frameSlots: frames kept in the ring
+        eventSlots: events kept in the ring
+    """
+    def __init__(self, name = "handTracking", maxHands = 2, frameSlots = 64, eventSlots = 256):
+        self.maxHands = maxHands
+        self.shm = shared_memory.SharedMemory(name, create=True, size=busSize(maxHands, frameSlots, eventSlots))
+
+        HEADER.pack_into(self.shm.buf, 0, MAGIC, VERSION, maxHands, frameSlots, eventSlots)
+        self.counters, self.frames, self.events = _layout(self.shm.buf, maxHands, frameSlots, eventSlots)
+        self.counters[:] = 0
+        self.frames["seq"] = 0
+        self.events["seq"] = 0
+
+    def publish(self, timestamp, landmarks, handedness, ids = None, events = ()):
+        """publish()
+
+        Args:
+            timestamp:  frame time in seconds
+            landmarks:  (hands, 21, 3) landmark array
+            handedness: list of "Left" / "Right" labels
+            ids:        persistent hand IDs (HandDetector.handIds), -1 if None
+            events:     events.py events and trajectory.Gestures of this frame
+        """
+        n = int(self.counters[0])
+        rec = self.frames[n % len(self.frames)]
+        hands = min(len(landmarks), self.maxHands)
+
+        rec["seq"] = 2 * n + 1
+        rec["timestamp"] = timestamp
+        rec["hands"] = hands
+        rec["handedness"] = 0
+        rec["ids"] = -1
+        rec["landmarks"][:hands] = landmarks[:hands]
+        for i in range(hands):
+            rec["handedness"][i] = HANDEDNESS_CODES.get(handedness[i], 0)
+        if ids is not None:
+            rec["ids"][:hands] = ids[:hands]
+        rec["seq"] = 2 * n + 2
+        self.counters[0] = n + 1
+
+        for event in events:
+            self._publishEvent(event)
+
+    def _publishEvent(self, event):
+        n = int(self.counters[1])
+        rec = self.events[n % len(self.events)]
+
+        # Not getattr(), namedtuples have count() and index() methods.
+        fields = event._asdict()
+
+        rec["seq"] = 2 * n + 1
+        rec["kind"] = EVENT_KINDS[type(event)]
+        rec["timestamp"] = event.timestamp
+        rec["hand"] = str(event.hand)
+        rec["position"] = fields.get("position", (0, 0))
+        rec["direction"] = fields.get("direction") or ""
+        rec["gesture"] = fields.get("kind", "")
+        rec["velocity"] = fields.get("velocity", 0.0)
+        rec["confidence"] = fields.get("confidence", 0.0)
+        rec["count"] = fields.get("count", 0)
+        rec["previous"] = fields.get("previous", 0)
+        rec["seq"] = 2 * n + 2
+        self.counters[1] = n + 1
+
+    def close(self):
+        # Views have to go before the block can be closed.
+        self.counters = self.frames = self.events = None
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class BusReader():
+    """BusReader()
+
+    Client side of a BusWriter's bus, in another process (or the same one).
+    latest() and frame views point straight into shared memory, poll() and
+    pollEvents() copy the records they return.
+
+    Args:
+        name:   shared memory name of the bus
+    """
+    def __init__(self, name = "handTracking"):
+        self.shm = shared_memory.SharedMemory(name)
+
+        # The block belongs to the writer, don't let this process' resource
+        # tracker unlink it when the reader exits.
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+
+        magic, version, maxHands, frameSlots, eventSlots = HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.shm.close()
+            raise ValueError(name + " is not a landmark bus")
+
+        self.maxHands = maxHands
+        self.counters, self.frames, self.events = _layout(self.shm.buf, maxHands, frameSlots, eventSlots)
+
+        # Next frame and event poll() / pollEvents() return, starting with new ones.
+        self.nextFrame = int(self.counters[0])
+        self.nextEvent = int(self.counters[1])
+        self.dropped = 0
+        self.droppedEvents = 0
+
+    def frameCount(self):
+        return int(self.counters[0])
+
+    def valid(self, n):
+        """valid()
+
+        Returns:
+            bool: frame n is complete and not overwritten yet
+        """
+        return self.frames[n % len(self.frames)]["seq"] == 2 * n + 2
+
+    def latest(self):
+        """latest()
+
+        Zero-copy access to the newest frame. The arrays are views into the
+        ring and stay valid until the writer laps it (frameSlots frames later),
+        check valid(n) after using them if that can happen.
+
+        Returns:
+            tuple: (n, timestamp, landmarks, handedness, ids) of the newest
+                   frame, None before the first one
+        """
+        n = self.frameCount() - 1
+        if n < 0:
+            return None
+
+        return (n,) + self._unpack(self.frames[n % len(self.frames)])
+
+    def read(self, n):
+        """read()
+
+        Returns:
+            tuple: (timestamp, landmarks, handedness, ids) copy of frame n, None
+                   if it's not written yet or already overwritten
+        """
+        rec = self.frames[n % len(self.frames)].copy()
+        if rec["seq"] != 2 * n + 2 or not self.valid(n):
+            return None
+
+        return self._unpack(rec)
+
+    def _unpack(self, rec):
+        hands = int(rec["hands"])
+        handedness = [HANDEDNESS_LABELS.get(int(code), "Unknown") for code in rec["handedness"][:hands]]
+
+        return float(rec["timestamp"]), rec["landmarks"][:hands], handedness, rec["ids"][:hands]
+
+    def poll(self):
+        """poll()
+
+        Returns:
+            list: (n, timestamp, landmarks, handedness, ids) of every frame
+                  since the last poll(), frames the writer already overwrote
+                  are counted in self.dropped
+        """
+        end = self.frameCount()
+        start = max(self.nextFrame, end - len(self.frames))
+        self.dropped += start - self.nextFrame
+
+        ret = []
+        for n in range(start, end):
+            frame = self.read(n)
+            if frame is None:
+                self.dropped += 1
+            else:
+                ret.append((n,) + frame)
+        self.nextFrame = end
+
+        return ret
+
+    def pollEvents(self):
+        """pollEvents()
+
+        Returns:
+            list: events.py events and trajectory.Gestures published since
+                  the last pollEvents()
+        """
+        end = int(self.counters[1])
+        start = max(self.nextEvent, end - len(self.events))
+        self.droppedEvents += start - self.nextEvent
+
+        ret = []
+        for n in range(start, end):
+            rec = self.events[n % len(self.events)].copy()
+            if rec["seq"] != 2 * n + 2 or self.events[n % len(self.events)]["seq"] != 2 * n + 2:
+                self.droppedEvents += 1
+            else:
+                ret.append(self._event(rec))
+        self.nextEvent = end
+
+        return ret
+
+    def _event(self, rec):
+        kind = int(rec["kind"])
+        timestamp = float(rec["timestamp"])
+        hand = str(rec["hand"])
+        position = rec["position"].tolist()
+
+        if kind == EVENT_KINDS[GrabStart]:
+            return GrabStart(timestamp, hand, position)
+        if kind == EVENT_KINDS[GrabEnd]:
+            return GrabEnd(timestamp, hand, position)
+        if kind == EVENT_KINDS[Swipe]:
+            return Swipe(timestamp, hand, str(rec["direction"]), float(rec["velocity"]))
+        if kind == EVENT_KINDS[FingerCountChanged]:
+            return FingerCountChanged(timestamp, hand, int(rec["count"]), int(rec["previous"]))
+
+        return Gesture(timestamp, hand, str(rec["gesture"]), str(rec["direction"]) or None, float(rec["velocity"]), float(rec["confidence"]))
+
+    def close(self):
+        # Arrays from latest() must be gone too, they keep the block mapped.
+        self.counters = self.frames = self.events = None
+        self.shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
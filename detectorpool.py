@@ -0,0 +1,131 @@
+import importlib
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+import handModule as hm
+
+
+def warmUp(detector, shape = (480, 640, 3)):
+    """warmUp()
+
+    Runs one dummy inference so the model is loaded and the graph is
+    initialized before the first real frame, then forgets it again.
+
+    Args:
+        detector:   HandDetector to warm up
+        shape:      shape of the dummy frame, use the camera's
+    """
+    detector.process(np.zeros(shape, dtype=np.uint8))
+    detector.reset()
+
+
+class DetectorPool():
+    """DetectorPool()
+
+    Preloads and warms up size HandDetectors, so streams or workers that
+    (re)start take a ready detector instead of loading the model again.
+
+    Args:
+        size:           number of detectors to preload
+        shape:          frame shape for the warm-up inference
+        grow:           create a new (cold) detector when the pool is empty,
+                        instead of waiting for one to be released
+        detectorArgs:   passed on to HandDetector()
+    """
+    def __init__(self, size = 2, shape = (480, 640, 3), grow = True, **detectorArgs):
+        self.shape = shape
+        self.grow = grow
+        self.detectorArgs = detectorArgs
+        self.free = queue.Queue()
+        self.created = 0
+
+        # Model loading is native code, so the detectors load in parallel.
+        start = time.perf_counter()
+        with ThreadPoolExecutor(size) as executor:
+            for detector in executor.map(lambda _: self._create(), range(size)):
+                self.free.put(detector)
+        self.loadTime = time.perf_counter() - start
+
+    def _create(self):
+        detector = hm.HandDetector(**self.detectorArgs)
+        warmUp(detector, self.shape)
+        self.created += 1
+
+        return detector
+
+    def acquire(self, timeout = None):
+        """acquire()
+
+        Args:
+            timeout:    seconds to wait for a free detector when the pool doesn't grow
+        Returns:
+            HandDetector: a warm detector with no tracking state, give it back
+                          with release()
+        """
+        try:
+            return self.free.get(block = not self.grow, timeout = timeout)
+        except queue.Empty:
+            if not self.grow:
+                raise
+            return self._create()
+
+    def release(self, detector):
+        detector.stopRecording()
+        detector.reset()
+        self.free.put(detector)
+
+    @contextmanager
+    def detector(self, timeout = None):
+        """detector()
+
+        with pool.detector() as detector:
+            ...
+        """
+        detector = self.acquire(timeout)
+        try:
+            yield detector
+        finally:
+            self.release(detector)
+
+
+def measureStartup(frame, pool = None, **detectorArgs):
+    """measureStartup()
+
+    Measures the time from nothing to the first landmarks of frame, either
+    cold (import, model load, first inference) or from a warm pool.
+
+    Args:
+        frame:          BGR frame to find hands on
+        pool:           DetectorPool to take the detector from, None for a cold start
+        detectorArgs:   passed on to HandDetector() for a cold start
+    Returns:
+        dict: seconds spent importing, getting a detector, on the first
+              frame, and in total
+    """
+    start = time.perf_counter()
+    importlib.import_module("mediapipe")
+    importlib.import_module("cv2")
+    imported = time.perf_counter()
+
+    if pool is None:
+        detector = hm.HandDetector(**detectorArgs)
+    else:
+        detector = pool.acquire()
+    ready = time.perf_counter()
+
+    detector.findHands(frame, draw = False)
+    done = time.perf_counter()
+
+    if pool is not None:
+        pool.release(detector)
+
+    return {
+        "import": imported - start,
+        "detector": ready - imported,
+        "firstFrame": done - ready,
+        "total": done - start,
+    }
@@ -0,0 +1,254 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+import handModule as hm
+import replay as rp
+from bench import summarize, parseResolutions
+
+
+# Landmarks of each finger that curl towards the palm, thumb to pinky,
+# with how far each one moves (see replay.CURL).
+FINGER_JOINTS = np.array(rp.FINGER_POINTS).reshape(5, 3)
+JOINT_CURL = rp.CURL[:3, 0]
+
+
+# Grab detectors as a score per hand and the threshold they use: a hand
+# grabs when its score is below the threshold. Scores come from
+# hm.evaluateGestures(), the same batch the methods read.
+def tipScore(batch):
+    return batch["tipSpread"].min(axis=1)
+
+def palmScore(batch):
+    return batch["palmDist"]
+
+GRAB_DETECTORS = {
+    "checkGrab": (tipScore, hm.GRAB_DIST),
+    "checkGrabCnt": (tipScore, hm.GRAB_CNT_DIST),
+    "checkGrabAlt": (palmScore, hm.GRAB_ALT_DIST),
+}
+
+
+def syntheticDataset(samples = 5000, seed = 0, noise = 0.003):
+    """syntheticDataset()
+
+    Generates labelled hands: every finger is randomly open or curled, and
+    hands are scaled, rotated and moved around the frame. A hand is labelled
+    as grabbing when all five fingers are curled.
+
+    Args:
+        samples:    number of hands
+        seed:       seed of the generator
+        noise:      landmark jitter (normalized)
+    Returns:
+        dict: landmarks (samples, 21, 3), grab (samples,) bool and
+              fingerCount (samples,) int
+    """
+    rng = np.random.default_rng(seed)
+
+    # Half of the hands are fists, the rest have random fingers up.
+    curled = rng.random((samples, 5)) < 0.5
+    curled[: samples // 2] = True
+    amount = curled * rng.uniform(0.8, 1.05, (samples, 5))
+
+    palm = rp.OPEN_HAND[[0, 5, 9, 13, 17]].mean(axis=0)
+    shape = np.broadcast_to(rp.OPEN_HAND, (samples, hm.NUM_LANDMARKS, 2)).copy()
+    for finger in range(5):
+        joints = FINGER_JOINTS[finger]
+        curl = (amount[:, finger, None] * JOINT_CURL)[:, :, None]
+        shape[:, joints] += curl * (palm - shape[:, joints])
+
+    # Hand size, roll and position in the frame.
+    scale = rng.uniform(0.5, 1.8, samples)[:, None, None]
+    angle = rng.uniform(-0.5, 0.5, samples)
+    rotation = np.stack((np.cos(angle), -np.sin(angle), np.sin(angle), np.cos(angle)), axis=1).reshape(-1, 2, 2)
+    position = rng.uniform(0.25, 0.75, (samples, 1, 2))
+
+    landmarks = np.zeros((samples, hm.NUM_LANDMARKS, 3), dtype=np.float32)
+    landmarks[..., :2] = np.einsum("nij,nkj->nki", rotation, shape * scale) + position
+    landmarks[..., :2] += rng.normal(0, noise, (samples, hm.NUM_LANDMARKS, 2))
+    landmarks[..., 2] = rng.normal(0, 0.01, (samples, hm.NUM_LANDMARKS))
+
+    return {
+        "landmarks": landmarks,
+        "grab": curled.all(axis=1),
+        "fingerCount": 5 - curled.sum(axis=1),
+    }
+
+
+def loadDataset(path):
+    """loadDataset()
+
+    Args:
+        path:   .npz file with landmarks (samples, 21, 3) and labels grab
+                (samples,) and/or fingerCount (samples,), see saveDataset()
+    Returns:
+        dict: the arrays in the file
+    """
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def saveDataset(path, dataset):
+    np.savez_compressed(path, **dataset)
+
+
+def precisionRecall(predicted, labels):
+    """precisionRecall()
+
+    Args:
+        predicted:  bool array
+        labels:     bool array, the ground truth
+    Returns:
+        dict: precision, recall, f1 and accuracy
+    """
+    tp = int((predicted & labels).sum())
+    fp = int((predicted & ~labels).sum())
+    fn = int((~predicted & labels).sum())
+
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+
+    return {
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        "accuracy": float((predicted == labels).mean()) if len(labels) else 0.0,
+    }
+
+
+def bestThreshold(scores, labels):
+    """bestThreshold()
+
+    Args:
+        scores:     per hand score, lower means grab
+        labels:     bool array, the ground truth
+    Returns:
+        tuple: (threshold, f1) with the best f1 over all distinct scores
+    """
+    order = np.argsort(scores, kind="stable")
+    sortedLabels = labels[order]
+
+    # Predicting grab for the k lowest scores, for every k at once.
+    tp = np.cumsum(sortedLabels)
+    fp = np.cumsum(~sortedLabels)
+    fn = sortedLabels.sum() - tp
+    f1 = 2 * tp / np.maximum(2 * tp + fp + fn, 1)
+
+    best = int(np.argmax(f1))
+
+    return float(scores[order][best]), float(f1[best])
+
+
+def timeMethod(name, landmarks, width, height, runs = 500):
+    """timeMethod()
+
+    Times one HandDetector method per call, on single hands set one at a
+    time, so every call evaluates its frame from scratch.
+
+    Args:
+        name:       method name
+        landmarks:  (samples, 21, 3) hands to call it on
+        width:      image width
+        height:     image height
+        runs:       calls to time
+    Returns:
+        dict: summarize() of the call durations
+    """
+    detector = hm.HandDetector(source = [])
+    img = rp.frame(width, height)
+    method = getattr(detector, name)
+
+    times = []
+    for ind in range(min(runs, len(landmarks))):
+        detector.setLandmarks(landmarks[ind:ind+1], ["Right"])
+        start = time.perf_counter()
+        method(img)
+        times.append(time.perf_counter() - start)
+
+    return summarize(times)
+
+
+def evaluate(dataset, width = 1280, height = 920, runs = 500):
+    """evaluate()
+
+    Runs every grab detector and fingerCount() over a labelled dataset in
+    one batched pass, and times each method per call.
+
+    Args:
+        dataset:    dict from syntheticDataset() or loadDataset()
+        width:      image width, only its aspect ratio changes the results
+        height:     image height
+        runs:       calls timed per method
+    Returns:
+        dict: per method precision/recall (or finger count accuracy), the
+              threshold it uses, the best threshold on this data and latency
+    """
+    landmarks = dataset["landmarks"]
+    batch = hm.evaluateGestures(landmarks, width, height)
+
+    ret = {}
+    if "grab" in dataset:
+        labels = dataset["grab"].astype(bool)
+        for name, (score, threshold) in GRAB_DETECTORS.items():
+            scores = score(batch)
+            best, f1 = bestThreshold(scores, labels)
+
+            ret[name] = precisionRecall(scores <= threshold, labels)
+            ret[name].update({
+                "threshold": threshold,
+                "bestThreshold": best,
+                "bestF1": f1,
+                "latency": timeMethod(name, landmarks, width, height, runs),
+            })
+
+    if "fingerCount" in dataset:
+        counts = batch["fingersUp"].sum(axis=1)
+        error = np.abs(counts - dataset["fingerCount"])
+
+        ret["fingerCount"] = {
+            "accuracy": float((error == 0).mean()),
+            "meanError": float(error.mean()),
+            "latency": timeMethod("fingerCount", landmarks, width, height, runs),
+        }
+
+    return ret
+
+
+# ----------------------------- Main
+def main():
+    parser = argparse.ArgumentParser(description = "Evaluates accuracy and latency of the gesture methods on labelled landmarks.")
+    parser.add_argument("--dataset", help = ".npz with landmarks and grab / fingerCount labels, synthetic hands by default")
+    parser.add_argument("--samples", type = int, default = 5000, help = "synthetic hands to generate")
+    parser.add_argument("--seed", type = int, default = 0, help = "seed for the synthetic hands")
+    parser.add_argument("--resolutions", default = "640x480,1280x920,1920x1080", help = "comma separated WIDTHxHEIGHT list")
+    parser.add_argument("--runs", type = int, default = 500, help = "calls timed per method")
+    parser.add_argument("--output", help = "write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    if args.dataset:
+        dataset = loadDataset(args.dataset)
+    else:
+        dataset = syntheticDataset(args.samples, args.seed)
+
+    report = {
+        "dataset": args.dataset or "synthetic",
+        "samples": len(dataset["landmarks"]),
+        "results": [
+            {"width": width, "height": height, "methods": evaluate(dataset, width, height, args.runs)}
+            for width, height in parseResolutions(args.resolutions)
+        ],
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent = 2)
+    else:
+        json.dump(report, sys.stdout, indent = 2)
+        print()
+
+if __name__ == "__main__":
+    main()
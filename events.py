@@ -0,0 +1,163 @@
+import asyncio
+import math
+import time
+from collections import namedtuple
+
+import handModule as hm
+
+
+# Events, hand is the handedness key used by HandDetector.gestures().
+GrabStart = namedtuple("GrabStart", "timestamp hand position")
+GrabEnd = namedtuple("GrabEnd", "timestamp hand position")
+Swipe = namedtuple("Swipe", "timestamp hand direction velocity")
+FingerCountChanged = namedtuple("FingerCountChanged", "timestamp hand count previous")
+
+
+class EventStream():
+    """EventStream()
+
+    One consumer's view of GestureEvents, use it with async for. A consumer
+    that falls behind loses its oldest events instead of slowing anyone down.
+
+    Args:
+        events:     GestureEvents it belongs to
+        maxsize:    events buffered for this consumer
+    """
+    def __init__(self, events, maxsize = 64):
+        self.events = events
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    def close(self):
+        self.events.streams.discard(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+
+class GestureEvents():
+    """GestureEvents()
+
+    Turns the per-frame gesture state of a HandDetector into typed events:
+    GrabStart, GrabEnd, Swipe (direction and velocity in pixels per second)
+    and FingerCountChanged, each with the frame timestamp.
+
+    The capture loop calls update() once per frame after findHands(), from
+    any thread. It never waits on consumers, which read the events with:
+
+        async for event in gestureEvents:
+            ...
+
+    The consumer is unsubscribed when the loop ends. Streams taken with
+    subscribe() have to be close()d instead.
+
+    Args:
+        detector:   HandDetector to watch
+        loop:       asyncio loop the consumers run on, defaults to the loop
+                    of the first consumer
+    """
+    def __init__(self, detector, loop = None):
+        self.detector = detector
+        self.loop = loop
+        self.streams = set()
+
+        # Per hand state, keyed by handedness.
+        self.grabs = {}
+        self.fingers = {}
+
+    def subscribe(self, maxsize = 64):
+        """subscribe()
+
+        Must be called from the consumers' asyncio loop.
+
+        Args:
+            maxsize:    events buffered for this consumer
+        Returns:
+            EventStream: an async iterator over the events
+        """
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+
+        stream = EventStream(self, maxsize)
+        self.streams.add(stream)
+
+        return stream
+
+    async def __aiter__(self):
+        stream = self.subscribe()
+        try:
+            async for event in stream:
+                yield event
+        finally:
+            stream.close()
+
+    def update(self, img, timestamp = None):
+        """update()
+
+        Args:
+            img:        the frame findHands() was called with
+            timestamp:  frame time in seconds, defaults to now
+        Returns:
+            list: the events of this frame
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        gestures = self.detector.gestures(img)
+        events = []
+
+        for hand, state in gestures.items():
+            count = state["fingerCount"]
+            previous = self.fingers.get(hand)
+            if previous is not None and count != previous:
+                events.append(FingerCountChanged(timestamp, hand, count, previous))
+            self.fingers[hand] = count
+
+            grab = self.grabs.get(hand)
+            if state["grab"] and grab is None:
+                self.grabs[hand] = (timestamp, state["center"])
+                events.append(GrabStart(timestamp, hand, state["center"]))
+            elif not state["grab"] and grab is not None:
+                del self.grabs[hand]
+                events.append(GrabEnd(timestamp, hand, state["center"]))
+                events.append(self._swipe(img, timestamp, hand, grab, state["center"]))
+
+        # Hands that left the frame.
+        for hand in list(self.fingers):
+            if hand not in gestures:
+                del self.fingers[hand]
+                self.grabs.pop(hand, None)
+
+        if events and self.loop is not None:
+            try:
+                self.loop.call_soon_threadsafe(self._publish, events)
+            except RuntimeError:
+                # The consumers' loop is closed, nobody is listening anymore.
+                self.loop = None
+                self.streams.clear()
+
+        return events
+
+    def _swipe(self, img, timestamp, hand, grab, position):
+        start, origin = grab
+        dx = position[0] - origin[0]
+        dy = position[1] - origin[1]
+
+        direction = hm.swipeRegion(dx, dy, img.shape[1], img.shape[0])
+        velocity = math.hypot(dx, dy) / max(timestamp - start, 1e-6)
+
+        return Swipe(timestamp, hand, direction, velocity)
+
+    def _publish(self, events):
+        for stream in list(self.streams):
+            for event in events:
+                stream.put(event)
@@ -0,0 +1,110 @@
+import math
+
+import numpy as np
+
+
+def smoothingFactor(cutoff, dt):
+    tau = 1 / (2 * math.pi * cutoff)
+    return 1 / (1 + tau / dt)
+
+
+class OneEuroFilter():
+    """OneEuroFilter()
+
+    One Euro filter over all 21 landmarks of all hands at once. Slow
+    landmarks are smoothed hard (less jitter around the grab thresholds),
+    fast ones follow with little lag, see https://gery.casiez.net/1euro/
+
+    The filter also keeps the smoothed velocity, which predict() uses to
+    extrapolate the landmarks ahead and hide inference latency on screen.
+
+    Args:
+        minCutoff:  cutoff frequency in Hz for still hands, lower is smoother
+        beta:       how fast the cutoff rises with speed (normalized units per second),
+                    higher lags less on fast motion
+        dCutoff:    cutoff frequency in Hz for the velocity
+    """
+    def __init__(self, minCutoff = 1.0, beta = 10.0, dCutoff = 1.0):
+        self.minCutoff = minCutoff
+        self.beta = beta
+        self.dCutoff = dCutoff
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.dx = None
+        self.t = None
+        self.keys = None
+
+    def __call__(self, landmarks, timestamp, keys = None):
+        """__call__()
+
+        Args:
+            landmarks:  (hands, 21, 3) array
+            timestamp:  frame time in seconds
+            keys:       IDs of the hands, e.g. HandDetector.handIds. A hand keeps
+                        its state while its ID stays, a new ID starts over
+        Returns:
+            np.ndarray: the filtered (hands, 21, 3) float32 array
+        """
+        rows = None if self.x is None or timestamp <= self.t else self._rows(landmarks, keys)
+        self.keys = keys
+
+        if rows is None:
+            # New or different hands, nothing to smooth against yet.
+            self.x = landmarks.astype(np.float32)
+            self.dx = np.zeros_like(self.x)
+            self.t = timestamp
+            return self.x
+
+        if len(rows) != len(self.x) or (rows != np.arange(len(rows))).any():
+            # Hands new to the filter start at their landmarks, without velocity.
+            known = rows >= 0
+            x = landmarks.astype(np.float32)
+            dx = np.zeros_like(x)
+            x[known] = self.x[rows[known]]
+            dx[known] = self.dx[rows[known]]
+            self.x, self.dx = x, dx
+
+        dt = timestamp - self.t
+
+        a = smoothingFactor(self.dCutoff, dt)
+        self.dx = a * (landmarks - self.x) / dt + (1 - a) * self.dx
+
+        cutoff = self.minCutoff + self.beta * np.abs(self.dx)
+        tau = 1 / (2 * math.pi * cutoff)
+        a = 1 / (1 + tau / dt)
+        self.x = (a * landmarks + (1 - a) * self.x).astype(np.float32)
+        self.t = timestamp
+
+        return self.x
+
+    def _rows(self, landmarks, keys):
+        # Row of the previous frame each hand continues, -1 for new hands,
+        # None to restart the whole filter.
+        if landmarks.shape[1:] != self.x.shape[1:]:
+            return None
+
+        current = keys if keys is not None else list(range(len(landmarks)))
+        previous = self.keys if self.keys is not None else list(range(len(self.x)))
+
+        if len(set(current)) != len(current) or len(set(previous)) != len(previous):
+            # Duplicate IDs can't tell the hands apart.
+            return np.arange(len(current)) if current == previous else None
+
+        rows = {key: i for i, key in enumerate(previous)}
+
+        return np.array([rows.get(key, -1) for key in current], dtype=np.intp)
+
+    def predict(self, dt):
+        """predict()
+
+        Args:
+            dt:     seconds ahead of the last filtered frame, e.g. the inference latency
+        Returns:
+            np.ndarray: (hands, 21, 3) landmarks extrapolated with the smoothed velocity
+        """
+        if self.x is None:
+            return None
+
+        return (self.x + self.dx * dt).astype(np.float32)
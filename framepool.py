@@ -0,0 +1,134 @@
+import threading
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+
+class FramePool():
+    """FramePool()
+
+    Preallocated frame buffers that capture reads into, so the steady state
+    doesn't allocate a new image every frame. read() takes a buffer off the
+    free list and the caller hands it back with release() once nothing uses
+    the frame anymore (queued, being processed or drawn), e.g. after imshow().
+    When every buffer is in use read() waits for one, so size is the number
+    of frames alive at once: 1 for a plain loop, 2 * queueSize + 3 for the
+    pipeline.
+
+    Buffers are allocated on the first read, with the shape the camera returns.
+
+    Args:
+        size:   number of buffers
+    """
+    def __init__(self, size = 2):
+        self.size = size
+        self.buffers = None
+        self.free = deque()
+        self.available = threading.Condition()
+
+    def acquire(self, timeout = None):
+        """acquire()
+
+        Args:
+            timeout:    seconds to wait for a buffer, None waits forever
+        Returns:
+            np.ndarray: a free buffer, writeable again, or None if none was
+                        released in time
+        """
+        with self.available:
+            if not self.available.wait_for(lambda: self.free, timeout):
+                return None
+            buffer = self.free.popleft()
+
+        buffer.flags.writeable = True
+        return buffer
+
+    def release(self, frame):
+        """release()
+
+        Puts a frame from read() back on the free list. Frames that aren't
+        one of the pool's buffers (see read()) and buffers already released
+        are ignored.
+        """
+        if self.buffers is None or not any(frame is buffer for buffer in self.buffers):
+            return
+
+        with self.available:
+            if not any(frame is buffer for buffer in self.free):
+                self.free.append(frame)
+                self.available.notify()
+
+    def read(self, cap, buffer = None):
+        """read()
+
+        Args:
+            cap:    cv.VideoCapture or any source whose read() takes an output image
+            buffer: buffer from acquire() to read into, by default read() waits
+                    for a free one
+        Returns:
+            tuple: (success, frame) like cap.read(), frame is one of the pool's
+                   buffers, release() it when done
+        """
+        if self.buffers is None:
+            success, frame = cap.read()
+            if not success:
+                return success, frame
+
+            self.buffers = [np.empty_like(frame) for _ in range(self.size)]
+            self.free.extend(self.buffers)
+            buffer = self.acquire()
+            buffer[...] = frame
+            return success, buffer
+
+        if buffer is None:
+            buffer = self.acquire()
+        success, frame = cap.read(buffer)
+
+        # A source that can't write into the buffer (e.g. the size changed)
+        # returns a new array instead, use that one.
+        if not success or frame is not buffer:
+            self.release(buffer)
+        return success, frame
+
+
+def allocationsPerFrame(step, frames = 100, warmup = 10):
+    """allocationsPerFrame()
+
+    Measures the memory allocated while running step(), e.g. one capture +
+    findHands() iteration. Numpy and OpenCV images are tracked by tracemalloc.
+
+    Args:
+        step:   function running one frame
+        frames: frames to measure
+        warmup: frames run first, so buffers and caches are in place
+    Returns:
+        dict: mean and max bytes allocated per frame (peak above the level
+              before the frame, freed or not) and bytes still held after the frames
+    """
+    for _ in range(warmup):
+        step()
+
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+
+    peaks = []
+    before, _ = tracemalloc.get_traced_memory()
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        step()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - current)
+    after, _ = tracemalloc.get_traced_memory()
+
+    if not started:
+        tracemalloc.stop()
+
+    return {
+        "frames": frames,
+        "meanBytes": float(np.mean(peaks)),
+        "maxBytes": int(np.max(peaks)),
+        "retainedBytes": after - before,
+    }
@@ -1,88 +1,660 @@
 #from turtle import Turtle
-import mediapipe as mp
-import cv2 as cv
 import numpy as np
 import math
 import time
+import functools
+import importlib
+
+from tracking import HandTracker
+
+
+class LazyModule():
+    """LazyModule()
+
+    Stands in for a module until it's first used, then imports it and
+    replaces itself in this module's globals. This way the geometry, replay
+    and recording code never pays for importing mediapipe and cv2.
+
+    Args:
+        name:   module to import
+        alias:  global name the module is used under
+    """
+    def __init__(self, name, alias):
+        self.name = name
+        self.alias = alias
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.name)
+        globals()[self.alias] = module
+
+        return getattr(module, attr)
+
+
+mp = LazyModule("mediapipe", "mp")
+cv = LazyModule("cv2", "cv")
+
+
+# Landmark indices, see:
+# https://google.github.io/mediapipe/images/mobile/hand_landmarks.png
+NUM_LANDMARKS = 21
+FINGER_TIPS = [4, 8, 12, 16, 20]
+PALM_POINTS = [5, 9, 13, 17]
+
+# Joint compared against the fingertip when counting fingers (tip - FINGER_SHIFT).
+FINGER_SHIFT = 2
+
+# Hand size is the wrist to middle finger knuckle distance (0 to 9), all
+# geometry is measured in hand sizes so it doesn't depend on the resolution
+# or on how far the hand is from the camera.
+HAND_SIZE_POINTS = (0, 9)
+
+# Grab thresholds in hand sizes: fingertip spread for checkGrab()/checkGrabCnt()
+# and distance between center of mass and palm for checkGrabAlt().
+# The spreads were 0.02 and 0.025 normalized, the same for a hand of 0.16
+# image heights. checkGrabAlt() was 100 pixels (0.68 at 1280x920), which let
+# most open hands through, 0.35 scores best in evaluate.py.
+GRAB_DIST = 0.125
+GRAB_CNT_DIST = 0.156
+GRAB_ALT_DIST = 0.35     # tuned on evaluate.py's own synthetic hands, recheck on real data
+
+
+def landmarksToArray(multi_hand_landmarks):
+    """landmarksToArray()
+
+    Converts Mediapipe's multi_hand_landmarks into a single numpy array,
+    so that every landmark is only touched once per frame.
+
+    Args:
+        multi_hand_landmarks:   results.multi_hand_landmarks from Mediapipe (or None)
+    Returns:
+        np.ndarray: float32 array of shape (hands, 21, 3) with normalized x, y, z.
+    """
+    if not multi_hand_landmarks:
+        return np.empty((0, NUM_LANDMARKS, 3), dtype=np.float32)
+
+    return np.array(
+        [[(lm.x, lm.y, lm.z) for lm in hand.landmark] for hand in multi_hand_landmarks],
+        dtype=np.float32
+    )
+
+
+def handednessToList(multi_handedness):
+    """handednessToList()
+
+    Args:
+        multi_handedness:   results.multi_handedness from Mediapipe (or None)
+    Returns:
+        list: "Left" / "Right" label of each hand, same order as the landmarks.
+    """
+    if not multi_handedness:
+        return []
+
+    return [hand.classification[0].label for hand in multi_handedness]
+
+
+def palmCenter(points):
+    # 0, 5, 9, 13, 17, points on the palm triangle on MediaPipe documentation.
+    # Base of hand (0) counted 2 times for better accuracy.
+    return (points[:, PALM_POINTS].sum(axis=1) + 2 * points[:, 0]) / 6
+
+
+def handSize(points):
+    """handSize()
+
+    Args:
+        points: (hands, 21, n) landmarks in any coordinates
+    Returns:
+        np.ndarray: (hands,) wrist to middle finger knuckle distance
+    """
+    a, b = HAND_SIZE_POINTS
+
+    return np.linalg.norm(points[:, b] - points[:, a], axis=-1)
+
+
+def handCoords(landmarks, width = 1, height = 1, world = None):
+    """handCoords()
+
+    Args:
+        landmarks:  (hands, 21, 3) normalized landmarks
+        width:      image width, only the aspect ratio is used
+        height:     image height
+        world:      (hands, 21, 3) world landmarks in meters, used instead when given
+    Returns:
+        tuple: ((hands, 21, 2 or 3) landmarks in hand sizes, (hands,) hand
+               sizes in the source coordinates)
+    """
+    if world is not None and len(world) == len(landmarks):
+        points = world.astype(np.float64)
+    else:
+        # Normalized x and y have different units unless the image is square.
+        points = landmarks[:, :, :2] * np.array([width / height, 1.0])
+
+    size = handSize(points)
+
+    return points / np.maximum(size, 1e-9)[:, None, None], size
+
+
+def evaluateGestures(landmarks, width = 1, height = 1, world = None):
+    """evaluateGestures()
+
+    Evaluates finger states, grab state and distances of all hands
+    in one batched computation. Finger and grab tests work in hand sizes
+    (see handCoords()), so they give the same result at any resolution.
+
+    Args:
+        landmarks:  (hands, 21, 3) array, see landmarksToArray()
+        width:      image width, for the positions returned in pixels
+        height:     image height
+        world:      (hands, 21, 3) world landmarks to measure on instead, or None
+    Returns:
+        dict: numpy arrays with one row per hand
+              fingersUp:  (hands, 5) bool, thumb to pinky
+              tipSpread:  (hands, 5) fingertip distance to the fingertip average, in hand sizes
+              grab:       (hands,) bool, a fingertip is within GRAB_DIST of the average
+              center:     (hands, 2) center of mass in pixels
+              palm:       (hands, 2) center of palm in pixels
+              centerNormalized: (hands, 2) center of mass in normalized coordinates
+              palmNormalized:   (hands, 2) center of palm in normalized coordinates
+              palmDist:   (hands,) distance between center and palm, in hand sizes
+              handSize:   (hands,) hand size in image heights (or meters with world)
+    """
+    size = np.array([width, height], dtype=np.float64)
+    xy = landmarks[:, :, :2]
+    palmXY = palmCenter(xy)
+    centerXY = xy.mean(axis=1)
+
+    points, scale = handCoords(landmarks, width, height, world)
+    palm = palmCenter(points)
+
+    # A finger is up when its tip is further from the palm than its joint.
+    tips = np.array(FINGER_TIPS)
+    distA = np.linalg.norm(points[:, tips] - palm[:, None], axis=2)
+    distB = np.linalg.norm(points[:, tips - FINGER_SHIFT] - palm[:, None], axis=2)
+
+    fingerTips = points[:, tips]
+    tipSpread = np.linalg.norm(fingerTips - fingerTips.mean(axis=1, keepdims=True), axis=2)
+
+    return {
+        "fingersUp": distA > distB,
+        "tipSpread": tipSpread,
+        "grab": (tipSpread <= GRAB_DIST).any(axis=1),
+        "center": (centerXY * size).astype(np.int32),
+        "palm": (palmXY * size).astype(np.int32),
+        "centerNormalized": centerXY,
+        "palmNormalized": palmXY,
+        "palmDist": np.linalg.norm(points.mean(axis=1) - palm, axis=1),
+        "handSize": scale,
+    }
+
+
+def swipeRegion(dx, dy, width, height):
+    """swipeRegion()
+
+    Splits the plane around the grab position into 4 regions with the
+    lines y = +-(height/width)x and returns the one (dx, dy) lands in.
+
+    Args:
+        dx:     release x position relative to the grab position
+        dy:     release y position relative to the grab position
+        width:  image width
+        height: image height
+    Returns:
+        string: "Up", "Down", "Left" or "Right"
+    """
+    # Variables for determine which region, 
+    # (a, b): (1, 1) top, (1, 0) left, (0, 1) right, (0, 0) bottom
+    a = 1 if dy >= (height/width) * dx else 0
+    b = 1 if dy >= -(height/width) * dx else 0
+
+    # Camera is mirror, so go opposite
+    if a == 1:
+        return "Down" if b == 1 else "Right"
+
+    return "Left" if b == 1 else "Up"
+
+
+def timed(func):
+    """timed()
+
+    Records the wall time of a HandDetector method under its name
+    when telemetry is enabled.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self.telemetry is None:
+            return func(self, *args, **kwargs)
+
+        start = time.perf_counter()
+        ret = func(self, *args, **kwargs)
+        self.telemetry.record(func.__name__, time.perf_counter() - start)
+
+        return ret
+
+    return wrapper
 
 
 class HandDetector():
-    def __init__(self, mode = False, maxHands = 2, detectionCon= 0.5, trackCon = 0.5, grabbed = False, grabPos = []):
+    def __init__(self, mode = False, maxHands = 2, detectionCon= 0.5, trackCon = 0.5, grabbed = False, grabPos = [], source = None, modelComplexity = 1, scale = 1.0, worldGeometry = False):
         self.mode = mode
         self.maxHands = maxHands
         self.detectionCon = detectionCon
         self.trackCon = trackCon
 
+        # 0 is the lighter Mediapipe model, 1 the full one. Inference runs on the
+        # frame scaled by scale, see presets.py.
+        self.modelComplexity = modelComplexity
+        self.scale = scale
+
+        # Measure finger and grab geometry on Mediapipe's world landmarks (3D,
+        # in meters) instead of the normalized ones, when a frame has them.
+        self.worldGeometry = worldGeometry
+
+        # Optional landmark source replacing Mediapipe, see replay.py.
+        # findHands() then takes the next (landmarks, handedness) from it.
+        self.source = None if source is None else iter(source)
+
         # Mediapipe hands solution, might need to be updated 
-        # as Mediapipe gets updated in the future
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-                                        self.mode,
-                                        self.maxHands,
-                                        1,
-                                        self.detectionCon,
-                                        self.trackCon
-                                        )
-        self.mp_draw = mp.solutions.drawing_utils
-
-        # Variables for swipe direction function
+        # as Mediapipe gets updated in the future.
+        # Not needed (nor imported) when replaying a source.
+        self.mp_hands = None
+        self.hands = None
+        self.mp_draw = None
+        if source is None:
+            self.mp_hands = mp.solutions.hands
+            self.hands = self.mp_hands.Hands(
+                                            static_image_mode = self.mode,
+                                            max_num_hands = self.maxHands,
+                                            model_complexity = self.modelComplexity,
+                                            min_detection_confidence = self.detectionCon,
+                                            min_tracking_confidence = self.trackCon
+                                            )
+            self.mp_draw = mp.solutions.drawing_utils
+
+            # Created once instead of per hand per frame.
+            self.landmarkSpec = self.mp_draw.DrawingSpec(color=(207,252,3), thickness=5, circle_radius=3)
+            self.connectionSpec = self.mp_draw.DrawingSpec(color=(255,255,255), thickness=5, circle_radius=1)
+
+        # Variables for swipe direction function, summary of the per hand
+        # grab state in self.tracker after each swipeDirection() call.
         self.grabbed = grabbed
         self.grabPos = grabPos
         self.direction = "None"
 
+        # Landmarks of the current frame, filled once per frame by findHands().
+        # Shape is (hands, 21, 3) with normalized x, y, z for every landmark.
+        self.results = None
+        self.landmarks = np.empty((0, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.rawLandmarks = self.landmarks
+        self.worldLandmarks = None
+        self.handedness = []
+        self._gestures = None
+
+        # Persistent hand IDs and the per ID state (grab, swipe), see tracking.py.
+        # Hands are kept in the order of their IDs, so handNo stays on the same hand.
+        self.tracker = HandTracker(maxHands + 2)
+        self.handIds = np.empty(0, dtype=np.int64)
+        self.handRows = np.empty(0, dtype=np.intp)
+
+        # Optional recording.LandmarkRecorder, see startRecording().
+        self.recorder = None
+
+        # Optional telemetry.Telemetry, see enableTelemetry().
+        self.telemetry = None
+
+        # Optional landmark filter, see setFilter().
+        self.filter = None
+
+        # RGB and scaled frame buffers reused by toRGB() and resize().
+        self._rgb = None
+        self._scaled = None
+
     def findHands(self, img, draw = True):
-        # Make img RGB so it can be used in the process function
-        imgRGB = cv.cvtColor(img, cv.COLOR_BGR2RGB)
-        self.results = self.hands.process(imgRGB)
+        # A replay source raises StopIteration once it runs out of frames.
+        if self.source is not None:
+            self.results = None
+            self.setLandmarks(*next(self.source))
+            return img
+
+        self.setResults(self.process(img))
+
+        if draw:
+            self.drawHands(img)
+
+        return img
+
+    def process(self, img):
+        """process()
+
+        Runs Mediapipe on a BGR image without touching the detector's
+        per-frame state, so inference can run on its own thread.
+        The image is scaled by self.scale first, landmarks are normalized
+        so they still match the original image.
+
+        Args:
+            img:    a BGR image to find hands on
+        Returns:
+            Mediapipe results, pass them to setResults()
+        """
+        if self.telemetry is None:
+            # Make img RGB so it can be used in the process function
+            return self.hands.process(self.toRGB(self.resize(img)))
+
+        start = time.perf_counter()
+        imgRGB = self.toRGB(self.resize(img))
+        mid = time.perf_counter()
+        results = self.hands.process(imgRGB)
+        self.telemetry.record("convert", mid - start)
+        self.telemetry.record("inference", time.perf_counter() - mid)
+
+        return results
+
+    def resize(self, img):
+        """resize()
+
+        Args:
+            img:    a BGR image
+        Returns:
+            np.ndarray: img scaled by self.scale into a reused buffer, img
+                        itself for scale 1
+        """
+        if self.scale == 1.0:
+            return img
+
+        h, w = img.shape[:2]
+        size = (max(int(w * self.scale), 1), max(int(h * self.scale), 1))
+        shape = (size[1], size[0]) + img.shape[2:]
+        if self._scaled is None or self._scaled.shape != shape:
+            self._scaled = np.empty(shape, dtype=img.dtype)
+
+        cv.resize(img, size, dst = self._scaled, interpolation = cv.INTER_AREA)
+
+        return self._scaled
+
+    def toRGB(self, img):
+        """toRGB()
+
+        Converts a BGR image to RGB into a buffer reused across frames, so
+        no new image is allocated per frame. The buffer is marked read-only,
+        which lets Mediapipe take it without copying, and is overwritten by
+        the next call.
+
+        Args:
+            img:    a BGR image
+        Returns:
+            np.ndarray: the RGB image
+        """
+        if self._rgb is None or self._rgb.shape != img.shape:
+            self._rgb = np.empty(img.shape, dtype=img.dtype)
+
+        self._rgb.flags.writeable = True
+        cv.cvtColor(img, cv.COLOR_BGR2RGB, dst = self._rgb)
+        self._rgb.flags.writeable = False
+
+        return self._rgb
+
+    def setResults(self, results):
+        """setResults()
+
+        Args:
+            results:    Mediapipe results returned by process()
+        """
+        self.results = results
+
+        # Convert the results once, every other method works on this array.
+        world = None
+        if self.worldGeometry and getattr(results, "multi_hand_world_landmarks", None):
+            world = landmarksToArray(results.multi_hand_world_landmarks)
+
+        landmarks = landmarksToArray(results.multi_hand_landmarks)
+        handedness = handednessToList(results.multi_handedness)
+
+        # Record what Mediapipe returned, before the filter and the ID order,
+        # so a replay goes through both again.
+        if self.recorder is not None:
+            self.recorder.write(time.time(), landmarks, handedness)
+
+        self.setLandmarks(landmarks, handedness, world = world)
+
+    @timed
+    def drawHands(self, img):
+        """drawHands()
+
+        Plots the skeletal structure of the current frame's hands on img.
 
-        if self.results.multi_hand_landmarks:
+        Args:
+            img:    an image to draw on
+        Returns:
+            img
+        """
+        if self.results is not None and self.results.multi_hand_landmarks:
             for hand_landmarks in self.results.multi_hand_landmarks:
-                if draw:
-                    self.mp_draw.draw_landmarks(
-                        img,
-                        hand_landmarks,
-                        self.mp_hands.HAND_CONNECTIONS,
-                        self.mp_draw.DrawingSpec(color=(207,252,3), thickness=5, circle_radius=3),
-                        self.mp_draw.DrawingSpec(color=(255,255,255), thickness=5, circle_radius=1)
-                    )
+                self.mp_draw.draw_landmarks(
+                    img,
+                    hand_landmarks,
+                    self.mp_hands.HAND_CONNECTIONS,
+                    self.landmarkSpec,
+                    self.connectionSpec
+                )
 
         return img
-    
+
+    def enableTelemetry(self, telemetry = None, port = None):
+        """enableTelemetry()
+
+        Starts recording the wall time of each stage of a frame: BGR to RGB
+        conversion, inference, drawing and every gesture method.
+
+        Args:
+            telemetry:  telemetry.Telemetry to record into, a new one by default
+            port:       also serve the rolling percentiles on
+                        http://127.0.0.1:port/metrics
+        Returns:
+            Telemetry: call summary() on it for the rolling percentiles
+        """
+        from telemetry import Telemetry
+
+        self.telemetry = Telemetry() if telemetry is None else telemetry
+        if port is not None:
+            self.telemetry.serve(port)
+
+        return self.telemetry
+
+    def disableTelemetry(self):
+        if self.telemetry is not None:
+            self.telemetry.stop()
+            self.telemetry = None
+
+    def startRecording(self, path):
+        """startRecording()
+
+        Streams the landmarks of every following frame into a binary file,
+        replay it with recording.LandmarkReader.
+
+        Args:
+            path:   file to write
+        """
+        from recording import LandmarkRecorder
+
+        self.stopRecording()
+        self.recorder = LandmarkRecorder(path, self.maxHands)
+
+    def stopRecording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def reset(self):
+        """reset()
+
+        Forgets the tracked hands and gesture state, so the next frame
+        starts with a full detection even in tracking mode (mode = False).
+        """
+        if self.hands is not None:
+            self.hands.reset()
+        self.tracker.reset()
+        self.results = None
+        self.setLandmarks(np.empty((0, NUM_LANDMARKS, 3), dtype=np.float32), [])
+        self.grabbed = False
+        self.grabPos = []
+        self.direction = "None"
+
+    def close(self):
+        """close()
+
+        Releases the Mediapipe graph and stops a recording. The detector
+        can't process frames afterwards, setLandmarks() still works.
+        """
+        self.stopRecording()
+        if self.hands is not None:
+            self.hands.close()
+            self.hands = None
+
+    def setLandmarks(self, landmarks, handedness, timestamp = None, world = None):
+        """setLandmarks()
+
+        Sets the landmarks of the current frame, called by setResults().
+        Hands get their persistent IDs (self.handIds) and are sorted by them,
+        the hand seen first is always handNo 0.
+        With a filter set (see setFilter()), self.landmarks holds the filtered
+        landmarks and self.rawLandmarks the unfiltered ones.
+
+        Args:
+            landmarks:  (hands, 21, 3) array of normalized landmarks
+            handedness: list of "Left" / "Right" labels, one per hand
+            timestamp:  frame time in seconds for the filter, defaults to now
+            world:      (hands, 21, 3) world landmarks for the gesture geometry, or None
+        """
+        ids, rows = self.tracker.update(landmarks, handedness)
+        order = np.argsort(ids, kind="stable")
+        if (order != np.arange(len(order))).any():
+            landmarks = landmarks[order]
+            handedness = [handedness[i] for i in order]
+            if world is not None:
+                world = world[order]
+        self.handIds = ids[order]
+        self.handRows = rows[order]
+
+        self.rawLandmarks = landmarks
+        if self.filter is not None:
+            # Filter state follows the IDs, so hands can come and go or swap.
+            landmarks = self.filter(landmarks, time.perf_counter() if timestamp is None else timestamp, self.handIds.tolist())
+
+        self.landmarks = landmarks
+        self.worldLandmarks = world
+        self.handedness = handedness
+        self._gestures = None
+
+    def setFilter(self, landmarkFilter):
+        """setFilter()
+
+        Args:
+            landmarkFilter: filters.OneEuroFilter (or any callable taking
+                            landmarks, timestamp, hand IDs) applied to every
+                            frame's landmarks, None turns filtering off
+        """
+        self.filter = landmarkFilter
+
+    def predictLandmarks(self, dt):
+        """predictLandmarks()
+
+        Args:
+            dt:     seconds ahead, e.g. the inference latency
+        Returns:
+            np.ndarray: (hands, 21, 3) landmarks predicted dt seconds after the
+                        current frame, the current ones without a filter
+        """
+        if self.filter is None:
+            return self.landmarks
+
+        return self.filter.predict(dt)
+
+    def handIndex(self, handId):
+        """handIndex()
+
+        Args:
+            handId: persistent ID of a hand, see self.handIds
+        Returns:
+            int: the hand's handNo in the current frame, None if it's not in frame
+        """
+        ind = np.flatnonzero(self.handIds == handId)
+
+        return int(ind[0]) if len(ind) else None
+
+    def _batch(self, img):
+        # Gestures are evaluated once per frame and image size.
+        h, w = img.shape[:2]
+        if self._gestures is None or self._gestures[0] != (w, h):
+            self._gestures = ((w, h), evaluateGestures(self.landmarks, w, h, self.worldLandmarks))
+
+        return self._gestures[1]
+
+    @timed
+    def gestures(self, img):
+        """gestures()
+
+        Evaluates the gestures of every detected hand in one batched pass.
+
+        Args:
+            img:    An image to process on
+        Returns:
+            dict: per-hand results keyed by handedness ("Left" / "Right",
+                  a later hand with the same label is keyed by the label and
+                  its handNo, e.g. "Right2" when hands 0 and 2 are both right).
+                  Each value is a dict with handNo, id (persistent hand ID),
+                  fingers (list of fingertip indices held up), fingerCount,
+                  grab, center and palm.
+        """
+        batch = self._batch(img)
+        tips = np.array(FINGER_TIPS)
+
+        ret = {}
+        for i, label in enumerate(self.handedness):
+            key = label if label not in ret else label + str(i)
+            up = batch["fingersUp"][i]
+            ret[key] = {
+                "handNo": i,
+                "id": int(self.handIds[i]),
+                "fingers": tips[up].tolist(),
+                "fingerCount": int(up.sum()),
+                "grab": bool(batch["grab"][i]),
+                "center": batch["center"][i].tolist(),
+                "palm": batch["palm"][i].tolist(),
+            }
+
+        return ret
+
+    @timed
     def findPosition(self, img, handNo = 0, draw = True):
         """findPosition()
 
         Args:
             img:    an img to process and find hands on
-            handNo: number of hands on the screen
+            handNo: hand to return, hands are ordered by their IDs (see handIndex()),
+                    2 returns every hand
             draw:   Used for debugging purposes
         Returns:
             list: a list of coordinates representing the points on a hand
                   according to this image:
                   https://google.github.io/mediapipe/images/mobile/hand_landmarks.png    
+                  With handNo = 2, hand i's points are retList[21 * i:21 * (i + 1)]
+                  and its ID is self.handIds[i].
         """
         
         self.retList = []
 
-        # Can be improved...
-        if handNo == 2:
-            if self.results.multi_hand_landmarks:
-                for hands in self.results.multi_hand_landmarks:
-                    for ind, lm in enumerate(hands.landmark):
-                        h, w, c = img.shape
-                        # h, w = 1, 1
-                        cx, cy = int(w*lm.x), int(h*lm.y)
-                        self.retList.append([ind, cx, cy])
-        else:
-            if self.results.multi_hand_landmarks:
-                currentHand = self.results.multi_hand_landmarks[handNo]
-                for ind, lm in enumerate(currentHand.landmark):
-                    h, w, c = img.shape
-                    # h, w = 1, 1
-                    cx, cy = int(w*lm.x), int(h*lm.y)
-                    self.retList.append([ind, cx, cy])
+        if len(self.landmarks) == 0:
+            return self.retList
+
+        pixels = self.pixelCoords(img)
+        if handNo != 2:
+            pixels = pixels[handNo:handNo+1]
+
+        ids = np.tile(np.arange(NUM_LANDMARKS), len(pixels))
+        self.retList = np.column_stack((ids, pixels.reshape(-1, 2))).tolist()
 
         return self.retList
 
+    @timed
     def fingerCount(self, img, handNo = 0, draw = True):
         """fingerCount()
 
@@ -94,51 +666,31 @@ class HandDetector():
             list: a list of numbers representing each finger
         
         Other Variables:
-            SHIFT: which joint is used in comparison against the fingertips
+            FINGER_SHIFT: which joint is used in comparison against the fingertips
                    when running the algorithm.
                    The algorithm works by determining whether the fingertip to palm
                    distance is shorter than the specified joint to palm distance.
                    In this case, we are using the 1st joint from the knuckles with
-                   SHIFT = 2
+                   FINGER_SHIFT = 2
+                   Distances are measured in hand sizes, not pixels, so the
+                   result doesn't depend on the image resolution.
         """
 
         # thumb: 4 = tip
         # index: 8 = tip, 5 = knuckle
         # middle: 12 = tip, 9 = knuckle
-        total = 0
-        indexList = []
+        # Making sure there are hands within the camera frame first.
+        if len(self.landmarks) == 0:
+            return []
 
-        SHIFT = 2;
+        # Index to pinky first, then the thumb.
+        order = [1, 2, 3, 4, 0]
+        up = self._batch(img)["fingersUp"][handNo][order]
 
-        # Making sure there are hands within the camera frame first.
-        if self.results.multi_hand_landmarks:
-            # Palm and center of mass coordinates.
-            # center = self.center_of_mass(img)    
-            palm_c = self.palm_center(img)
-
-            # Calculating the distances for index to pinky.
-            for i in range(8, 24, 4):
-                distA = self.dist(palm_c[0][0], palm_c[0][1], self.retList[i][1], self.retList[i][2])
-                distB = self.dist(palm_c[0][0], palm_c[0][1], self.retList[i-SHIFT][1], self.retList[i-SHIFT][2])
-                # cv.circle(img, (self.retList[i][1], self.retList[i][2]), 10, (255, 255, 255), 10)
-                
-                # print(i," ",distA, " " ,distB)
-                if distA > distB:
-                    indexList.append(i)
-                    total+=1
-
-            # Calculating thumb, separate from others due to physical differences.
-            # So, thumb might need to be treated differently in the future.
-            distA = self.dist(palm_c[0][0], palm_c[0][1], self.retList[4][1], self.retList[4][2])
-            distB = self.dist(palm_c[0][0], palm_c[0][1], self.retList[4-SHIFT][1], self.retList[4-SHIFT][2])
-            
-            if (distA > distB):
-                indexList.append(4)
-                total+=1
-
-        return indexList
-
-    def checkGrab(self, img, draw = True):
+        return np.array(FINGER_TIPS)[order][up].tolist()
+
+    @timed
+    def checkGrab(self, img, draw = True, handNo = None):
         """checkGrab()
 
         This function works by calculating the avg point of the finger tips
@@ -147,36 +699,22 @@ class HandDetector():
 
         Args:
             img:    an image to process
-            handNo: number of hands in frame
             draw:   Debugging purposes.
+            handNo: hand to check, None checks every hand in frame
         Returns:
-            Boolean: if the hand in frame is making a grabbing gesture.    
+            Boolean: if the hand (any hand for handNo = None) is making a grabbing gesture.    
         """
 
+        if len(self.landmarks) == 0:
+            return False
 
-        avg_x = 0
-        avg_y = 0
-
-        finger_tips = []
-
-        if self.results.multi_hand_landmarks:
-            for hand_landmarks in self.results.multi_hand_landmarks:
-                finger_tips = hand_landmarks.landmark[4:21:4]
+        grab = self._batch(img)["grab"]
+        if handNo is not None:
+            return bool(grab[handNo])
 
-            for points in finger_tips:
-                avg_x += points.x
-                avg_y += points.y
-            
-            avg_x = avg_x/5
-            avg_y = avg_y/5
-
-            for i in range(0, 5):
-                dist = math.sqrt(math.pow(finger_tips[i].x-avg_x, 2) + math.pow(finger_tips[i].y-avg_y, 2));
-                if dist <= 0.02:
-                    return True
-
-        return False
+        return bool(grab.any())
     
+    @timed
     def checkGrabAlt(self, img, handNo = 0, draw = True, debug = False):
         """checkGrabAlt()
 
@@ -187,7 +725,7 @@ class HandDetector():
         
         This function works by checking the distance between the center of the palm
         and the center of mass of the hand to see if they are within a certain
-        distance of each other.
+        distance of each other (GRAB_ALT_DIST hand sizes).
 
         Args:
             img:    an image to process
@@ -198,51 +736,43 @@ class HandDetector():
             Boolean: if the hand is making a grabbing gesture.
         """
 
-        if self.results.multi_hand_landmarks:
-            mass = self.center_of_mass(img)
-            cent = self.palm_center(img)
+        if len(self.landmarks) != 0:
+            batch = self._batch(img)
 
             if debug:
                 print("+-----CheckGrabAlt DEBUG-----+")
-                print("mass: ", mass)
-                print("cent: ", cent)
-                print("dist: ", self.dist(mass[0][0], mass[0][1], cent[0][0], cent[0][1]))
+                print("mass: ", batch["center"][handNo].tolist())
+                print("cent: ", batch["palm"][handNo].tolist())
+                print("dist: ", batch["palmDist"][handNo])
 
 
-            if self.dist(mass[0][0], mass[0][1], cent[0][0], cent[0][1]) < 100:
+            if batch["palmDist"][handNo] < GRAB_ALT_DIST:
                 return True
 
         return False
 
+    @timed
     def checkGrabCnt(self, img, draw = True, debug = False):
         grabCnt = 0
-        
-        if self.results.multi_hand_landmarks:
-            for hand_landmarks in self.results.multi_hand_landmarks:
-                avg_x, avg_y = 0, 0
-                fingerTips = hand_landmarks.landmark[4:21:4]
-                print(fingerTips[0].x)
-                for points in fingerTips:
-                    avg_x += points.x
-                    avg_y += points.y
-                
-                avg_x = avg_x/5
-                avg_y = avg_y/5
-
-                for i in range(0, 5):
-                    dist = math.sqrt(math.pow(fingerTips[i].x-avg_x, 2) + math.pow(fingerTips[i].y-avg_y, 2))
-                    if dist <= 0.025:
-                        grabCnt += 1
-                        break
+
+        if len(self.landmarks) != 0:
+            tipSpread = self._batch(img)["tipSpread"]
+            if debug:
+                print(self.landmarks[:, FINGER_TIPS[0], 0])
+
+            # A hand counts as grabbing when any of its tips is close to the average.
+            grabCnt = int((tipSpread <= GRAB_CNT_DIST).any(axis=1).sum())
         else:
             print("[Error! No hands detected]")
 
         return grabCnt
 
+    @timed
     def swipeDirection(self, img, debug = False):
         """swipeDirection()
 
-        NOTE: ONLY WORKS AS INTENDED WHEN 1 HAND IS DETECTED
+        Every hand has its own grab state, kept with its ID (see tracking.py),
+        so hands swapping order or leaving the frame don't mix up swipes.
 
         Concept: To determine the direction swiped, we use the 
         release position relative to the initial grab position
@@ -261,122 +791,84 @@ class HandDetector():
             img:    an image to process on
             debug:  debugging purposes.
         Returns:
-            string: the direction of the grab-swipping gesture
+            string: the direction of the grab-swipping gesture (of the
+                    first hand releasing its grab on this frame)
 
         """
         ret = "None"
         
-        if not self.results.multi_hand_landmarks:
+        if len(self.landmarks) == 0:
             return ret
 
-        # This is a toggle structure.
-        if self.checkGrab(img):
-            if self.grabbed == False:
-                self.grabbed = True
-                self.grabPos = self.center_of_mass(img)
-        else:
-            if self.grabbed == True:
-                self.grabbed = False
-                
-                # Calculate direction:
-                # Getting final position of hand when releasing grab
-                finalPos = self.center_of_mass(img)
-                
-                grab_x = self.grabPos[0][0]
-                grab_y = self.grabPos[0][1]
-                fin_x = finalPos[0][0]
-                fin_y = finalPos[0][1]
-
-                width = img.shape[1]
-                height = img.shape[0]
-
-                # Set initial position as origin:
-                fin_x -= grab_x
-                fin_y -= grab_y
-
-                # Variables for determine which region, 
-                # (a, b): (1, 1) top, (1, 0) left, (0, 1) right, (0, 0) bottom
-                a = -1
-                b = -1
-
-                if fin_y >= (height/width) * fin_x:
-                    a = 1;
-                else:
-                    a = 0
-                if fin_y >= -(height/width) * fin_x:
-                    b = 1;
-                else:
-                    b = 0
-
-                # Camera is mirror, so go opposite
-                if a == 1:
-                    if b == 1:
-                        ret = "Down"
-                    else:
-                        ret = "Right"                
-                else:
-                    if b == 1:
-                        ret = "Left"
-                    else:
-                        ret = "Up"
+        batch = self._batch(img)
+        table = self.tracker.table
+
+        # This is a toggle structure, per hand.
+        for i, row in enumerate(self.handRows):
+            if batch["grab"][i]:
+                if not table["grabbed"][row]:
+                    table["grabbed"][row] = True
+                    table["grabPos"][row] = batch["center"][i]
+            elif table["grabbed"][row]:
+                table["grabbed"][row] = False
+
+                # Release position relative to the grab position:
+                dx, dy = batch["center"][i] - table["grabPos"][row]
+                if ret == "None":
+                    ret = swipeRegion(dx, dy, img.shape[1], img.shape[0])
+
+        grabbed = table["grabbed"][self.handRows]
+        self.grabbed = bool(grabbed.any())
+        self.grabPos = table["grabPos"][self.handRows][grabbed].tolist()
 
         return ret
 
-    def center_of_mass(self, img): #handNo: 0 = first hand, 1 = second hand
+    @timed
+    def center_of_mass(self, img, normalized = False): #handNo: 0 = first hand, 1 = second hand
         """center_of_mass()
         
         Args:
-            img:    An image to process on
+            img:        An image to process on
+            normalized: return normalized coordinates (0 to 1) instead of pixels
         Returns:
             list: coordinates of the center of mass of the hand(s) based on
                   the landmarks.
 
         """
         
-        ret = []
-        if self.results.multi_hand_landmarks:
-            for hand_landmarks in self.results.multi_hand_landmarks:
-                avg_x = 0
-                avg_y = 0
-                for ind, lm in enumerate(hand_landmarks.landmark):
-                    avg_x += lm.x * img.shape[1]
-                    avg_y += lm.y * img.shape[0]
-                avg_x /= 21
-                avg_y /= 21
-                ret.append([int(avg_x), int(avg_y)])
-        
-        return ret
+        if len(self.landmarks) == 0:
+            return []
 
-    def palm_center(self, img):
+        return self._batch(img)["centerNormalized" if normalized else "center"].tolist()
+
+    @timed
+    def palm_center(self, img, normalized = False):
         """palm_center()
         
         Args:
-            img:    An image to process on
+            img:        An image to process on
+            normalized: return normalized coordinates (0 to 1) instead of pixels
         Returns:
             list: coordinates of the center of palm(s)
 
         """
-        ret = []
-        if self.results.multi_hand_landmarks:
-            for hand_landmarks in self.results.multi_hand_landmarks:
-                ## 0, 5, 9, 13, 17, points on the palm triangle on MediaPipe documentation.
-                fingerTips = hand_landmarks.landmark[5:18:4]
-                avg_x = 0
-                avg_y = 0
-            
-                for coords in fingerTips:
-                    avg_x += coords.x * img.shape[1]
-                    avg_y += coords.y * img.shape[0]
-
-                # 2 Times for base of hand for better accuracy
-                avg_x += 2 * hand_landmarks.landmark[0].x * img.shape[1]
-                avg_y += 2 * hand_landmarks.landmark[0].y * img.shape[0]
-
-                avg_x /= 6
-                avg_y /= 6
-                ret.append([int(avg_x), int(avg_y)])
-        
-        return ret
+        if len(self.landmarks) == 0:
+            return []
+
+        return self._batch(img)["palmNormalized" if normalized else "palm"].tolist()
+
+    def pixelCoords(self, img):
+        """pixelCoords()
+
+        Args:
+            img:    An image to process on
+        Returns:
+            np.ndarray: int array of shape (hands, 21, 2) with the pixel
+                        coordinates of every landmark.
+        """
+        size = np.array([img.shape[1], img.shape[0]], dtype=np.float64)
+
+        return (self.landmarks[:, :, :2] * size).astype(np.int32)
 
     def dist(self, x1, y1, x2, y2):
         """dist()
@@ -387,10 +879,29 @@ class HandDetector():
             x2: x position of second point
             y2: y position of second point
         Returns:
-            float: a number in pixels representing the distance.
+            float: the distance, in the units of the points (e.g. pixels).
+                   See handDist() for a distance that doesn't depend on the resolution.
         """
         return math.sqrt(math.pow(x1-x2, 2) + math.pow(y1-y2, 2))
 
+    def handDist(self, img, a, b, handNo = 0):
+        """handDist()
+
+        Args:
+            img:    An image to process on, only its aspect ratio is used
+            a:      first landmark index
+            b:      second landmark index
+            handNo: hand to measure on
+        Returns:
+            float: distance between landmarks a and b in hand sizes (wrist to
+                   middle finger knuckle), the same at any resolution and
+                   distance from the camera.
+        """
+        world = None if self.worldLandmarks is None else self.worldLandmarks[handNo:handNo+1]
+        points, _ = handCoords(self.landmarks[handNo:handNo+1], img.shape[1], img.shape[0], world)
+
+        return float(np.linalg.norm(points[0, a] - points[0, b]))
+
     def help(self):
         """help()
         
@@ -410,6 +921,9 @@ class HandDetector():
         print("center_of_mass():\tFinds the center of mass of the hand, indicated by a red dot.[Returns a list]")
         print("palm_center():\t\tFinds the center of the palm, indicated by a blue dot.[Returns a list]")
         print("dist():\t\t\tFinds the distance between two points.[Returns a float]")
+        print("handDist():\t\tFinds the distance between two landmarks in hand sizes.[Returns a float]")
+        print("gestures():\t\tEvaluates every gesture for all hands at once, keyed by handedness.[Returns a dict]")
+        print("handIndex():\t\tFinds the handNo of a persistent hand ID (detector.handIds).[Returns an int]")
         print("+--------------------------------------------------------------------------------------------------------------------+\n>>\n")
         print("!!!!!!!!!!\tREAD FOR CLARIFICATION\t!!!!!!!!!!")
         print("* For maximum accuracy, make sure environment is: ")
@@ -426,14 +940,16 @@ def main():
     ptime = 0
     ctime = 0
 
-    capture = cv.imread("airport_stock_footage1.mp4")
+    capture = cv.VideoCapture("airport_stock_footage1.mp4")
     detector = HandDetector()
 
-    while True:
+    while capture.isOpened():
         success, frame = capture.read()
+        if not success:
+            break
 
         ctime = time.time()
-        fps = 1 / (ctime - ptime)
+        fps = 1 / (ctime - ptime) if ptime and ctime > ptime else 0
         ptime = ctime
 
         detector.findHands(frame)
@@ -457,5 +973,8 @@ def main():
         if cv.waitKey(1) == 27:     # ESC to break
             break
 
+    capture.release()
+    cv.destroyAllWindows()
+
 if __name__ == "__main__":
     main()
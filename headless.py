@@ -0,0 +1,99 @@
+import argparse
+import signal
+import time
+
+import handModule as hm
+from bus import BusWriter
+from events import GestureEvents
+from framepool import FramePool
+from multistream import openSource
+from trajectory import TrajectoryRecognizer
+
+
+class HeadlessServer():
+    """HeadlessServer()
+
+    Runs capture and tracking without any window and publishes every frame's
+    landmarks and gesture events on a shared memory bus (see bus.py), so
+    several local readers share one HandDetector.
+
+    Args:
+        source:         camera index, video file, "synthetic" or a capture object,
+                        see multistream.openSource()
+        name:           shared memory name of the bus
+        frameSlots:     frames kept on the bus
+        eventSlots:     events kept on the bus
+        detectorArgs:   passed on to HandDetector()
+    """
+    def __init__(self, source = 0, name = "handTracking", frameSlots = 64, eventSlots = 256, **detectorArgs):
+        self.cap = openSource(source)
+        self.detector = hm.HandDetector(**detectorArgs)
+        self.bus = BusWriter(name, self.detector.maxHands, frameSlots, eventSlots)
+        self.events = GestureEvents(self.detector)
+        self.recognizer = TrajectoryRecognizer()
+        self.pool = FramePool(1)
+
+        self.running = False
+        self.frames = 0
+
+    def step(self):
+        """step()
+
+        Captures, tracks and publishes one frame.
+
+        Returns:
+            bool: False once the source runs out of frames
+        """
+        success, frame = self.pool.read(self.cap)
+        if not success:
+            return False
+
+        timestamp = time.time()
+        frame.flags.writeable = False
+        self.detector.findHands(frame, draw = False)
+
+        detector = self.detector
+        events = self.events.update(frame, timestamp) + self.recognizer.updateFrom(detector, timestamp)
+        self.bus.publish(timestamp, detector.landmarks, detector.handedness, detector.handIds, events)
+        self.pool.release(frame)
+        self.frames += 1
+
+        return True
+
+    def run(self):
+        self.running = True
+        try:
+            while self.running and self.step():
+                pass
+        finally:
+            self.close()
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.cap.release()
+        self.bus.close()
+
+
+# ----------------------------- Main
+def main():
+    parser = argparse.ArgumentParser(description = "Track hands without a window and publish them on a shared memory bus.")
+    parser.add_argument("source", nargs = "?", default = "0", help = "camera index, video file or synthetic")
+    parser.add_argument("--name", default = "handTracking", help = "shared memory name readers attach to")
+    parser.add_argument("--hands", type = int, default = 2, help = "max hands")
+    args = parser.parse_args()
+
+    server = HeadlessServer(args.source, args.name, maxHands = args.hands, detectionCon = 0.75, trackCon = 0.6)
+    signal.signal(signal.SIGTERM, lambda *_: server.stop())
+
+    print("Publishing on shared memory '" + args.name + "', Ctrl+C to stop")
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+
+    print("Published " + str(server.frames) + " frames")
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,17 @@ import mediapipe as mp
 import cv2 as cv
 import numpy as np
 import math
+import sys
 import time
 import handModule as hm
+from pipeline import Pipeline
+from scheduler import AdaptiveScheduler
+from roi import RoiDetector
+from filters import OneEuroFilter
+from overlay import OverlayRenderer, drawSkeletons, drawPoints
+from framepool import FramePool
+from trajectory import TrajectoryRecognizer
+from presets import createDetector, autoTune
 
 # ----------------------------- Global Variables
 
@@ -19,75 +28,90 @@ CENTEROFMASS    = False
 CENTEROFPALM    = False
 CHECKGRAB       = False
 SWIPEDIRECTION  = False
+TRAJECTORY      = False
 
-# ----------------------------- OpenCV & Module initiation
+# Run capture, inference and rendering as separate stages: python main.py --pipeline
+PIPELINE        = "--pipeline" in sys.argv
 
-cap = cv.VideoCapture(0)
+# Per-stage timings on http://127.0.0.1:9100/metrics: python main.py --telemetry
+TELEMETRY       = "--telemetry" in sys.argv
 
-detector = hm.HandDetector(detectionCon = 0.75, trackCon = 0.6)
+# Downscale / skip inference while hands are stable: python main.py --adaptive
+ADAPTIVE        = "--adaptive" in sys.argv
 
-detector.help()
+# Only run inference on the region around the tracked hands: python main.py --roi
+ROI             = "--roi" in sys.argv
 
-while cap.isOpened():
+# Smooth landmark jitter before the gesture checks: python main.py --smooth
+SMOOTH          = "--smooth" in sys.argv
 
-    success, frame = cap.read()
-    frame.flags.writeable = False
-    # frame = cv.resize(frame, (frame.shape[0], HEIGHT));
-    # frame = cv.flip(frame, 1)
+# Performance preset: python main.py --preset latency|balanced|accuracy
+PRESET          = sys.argv[sys.argv.index("--preset") + 1] if "--preset" in sys.argv else None
 
-    img = detector.findHands(frame)
-    detector.findPosition(frame, 2)
-    hasHands = detector.results.multi_hand_landmarks
+# Pick the most accurate preset reaching 30 fps on this machine: python main.py --autotune
+AUTOTUNE        = "--autotune" in sys.argv
+TARGET_FPS      = 30
 
-    # img = cv.flip(img, 1)
+MENU = [
+    "[G] Check Grab",
+    "[F] Finger Count",
+    "[M] Center of Mass (Red)",
+    "[P] Palm Center (Blue)",
+    "[D] Swipe Direction",
+    "[T] Trajectory Gestures",
+]
 
-    # -----------------------------FPS Calculations:
-    ctime = time.time()
-    fps = 1 / (ctime-ptime)
-    ptime = ctime
+# ----------------------------- Drawing & Key handling
+
+renderer = OverlayRenderer()
+recognizer = TrajectoryRecognizer()
+gesture = "None"
+
+def drawFeatures(img, frame, fps):
+    global gesture
 
     # -----------------------------Menu Display:
     cv.putText(img, "FPS: " + str(int(fps)), (50, 50), cv.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
-    cv.putText(img, "[G] Check Grab", (50, 100), cv.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
-    cv.putText(img, "[F] Finger Count", (50, 150), cv.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
-    cv.putText(img, "[M] Center of Mass (Red)", (50, 200), cv.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
-    cv.putText(img, "[P] Palm Center (Blue)", (50, 250), cv.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
-    cv.putText(img, "[D] Swipe Direction", (50, 300), cv.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
+    renderer.menu(img, MENU)
+
+    hasHands = len(detector.landmarks) != 0
 
     # -----------------------------Drawing Features:
     if FINGERCOUNTER == True:
         fCnt = detector.fingerCount(frame)
         cv.putText(img, "[Finger Count: " + str(int(len(fCnt))) + "]", (600, 50), cv.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
-    
+
     if CHECKGRAB == True:
         state = detector.checkGrabCnt(frame)
         cv.putText(img, "[Grabbing: " + str(int(state)) + "]", (1050, 50), cv.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
 
     if CENTEROFMASS == True and hasHands:
         centers = detector.center_of_mass(frame)
-        for hand in centers:
-            cv.circle(img, (hand[0], hand[1]), 3, (0, 0, 255), 10)
-    
+        drawPoints(img, centers, (0, 0, 255), 8)
+
     if CENTEROFPALM == True and hasHands:
-        palm = detector.palm_center(frame, 0)
-        for ind, hand in enumerate(palm):
-            cv.circle(img, (hand[0], hand[1]), 3, (255, 0, 0), 10)
+        palm = detector.palm_center(frame)
+        drawPoints(img, palm, (255, 0, 0), 8)
 
 
     if SWIPEDIRECTION == True:
         direction = detector.swipeDirection(frame)
         cv.putText(img, "[Direction: " + detector.direction + "]", (1390, 50), cv.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
-        
+
         if direction != "None":
             detector.direction = direction
             print(direction)
 
-    # -----------------------------Displaying
-    cv.imshow('Video', img)
+    if TRAJECTORY == True:
+        for g in recognizer.updateFrom(detector, time.time()):
+            gesture = g.kind + " " + str(g.direction)
+            print(g)
+        cv.putText(img, "[Gesture: " + gesture + "]", (50, HEIGHT - 50), cv.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
 
-    # -----------------------------Toggling features for demonstration purposes.
-    KEY = cv.waitKey(5)
+def handleKey(KEY):
+    global FINGERCOUNTER, CHECKGRAB, CENTEROFMASS, CENTEROFPALM, SWIPEDIRECTION, TRAJECTORY
 
+    # -----------------------------Toggling features for demonstration purposes.
     if KEY & 0xFF == ord('f'):
         FINGERCOUNTER = not FINGERCOUNTER
 
@@ -99,15 +123,128 @@ while cap.isOpened():
 
     if KEY & 0xFF == ord('p'):
         CENTEROFPALM = not CENTEROFPALM
-    
+
     if KEY & 0xFF == ord('d'):
         SWIPEDIRECTION = not SWIPEDIRECTION
         detector.direction = "None"
-        
+
+    if KEY & 0xFF == ord('t'):
+        TRAJECTORY = not TRAJECTORY
+
+# ----------------------------- OpenCV & Module initiation
+
+cap = cv.VideoCapture(0)
+
+if AUTOTUNE:
+    success, frame = cap.read()
+    if not success:
+        frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    PRESET, detector, measured = autoTune(frame, TARGET_FPS)
+    print("Auto-tune: " + ", ".join(name + " " + str(int(fps)) + " fps" for name, fps in measured.items()) + ", using " + PRESET)
+elif PRESET is not None:
+    detector = createDetector(PRESET)
+else:
+    detector = hm.HandDetector(detectionCon = 0.75, trackCon = 0.6)
+
+detector.help()
+
+if TELEMETRY:
+    detector.enableTelemetry(port = 9100)
+
+if SMOOTH:
+    detector.setFilter(OneEuroFilter())
+
+scheduler = detector
+if ADAPTIVE:
+    scheduler = AdaptiveScheduler(detector)
+elif ROI:
+    scheduler = RoiDetector(detector)
+
+if PIPELINE:
+    pipeline = Pipeline(cap, detector, pool = FramePool(6)).start()
+
+    try:
+        while pipeline.isRunning():
+
+            packet = pipeline.get()
+            if packet is None:
+                # Keep the window responsive while no frame arrives.
+                KEY = cv.waitKey(1)
+                handleKey(KEY)
+                if KEY == 27:
+                    break
+                continue
+
+            stamp, frame, results = packet
+
+            # -----------------------------Rendering, the frame is only read by other stages until here.
+            start = time.perf_counter()
+            frame.flags.writeable = True
+            detector.setResults(results)
+            img = drawSkeletons(frame, detector.pixelCoords(frame))
+
+            # -----------------------------FPS Calculations:
+            ctime = time.time()
+            fps = 1 / (ctime-ptime) if ptime and ctime > ptime else 0
+            ptime = ctime
+
+            drawFeatures(img, frame, fps)
+
+            stats = pipeline.stats()
+            cv.putText(img, "cap %.1fms inf %.1fms draw %.1fms" % (stats["capture"], stats["inference"], stats["render"]),
+                       (50, 350), cv.FONT_HERSHEY_PLAIN, 2, (255, 0, 255), 2)
+            pipeline.renderTime(time.perf_counter() - start)
+
+            # -----------------------------Displaying
+            cv.imshow('Video', img)
+            pipeline.release(frame)
+
+            KEY = cv.waitKey(1)
+            handleKey(KEY)
+
+            # -----------------------------Exit Condition
+            if KEY == 27:     # ESC to break
+                break
+    finally:
+        pipeline.stop()
+
+# Capture into reused buffers instead of a new image every frame.
+pool = FramePool(1)
+
+while not PIPELINE and cap.isOpened():
+
+    success, frame = pool.read(cap)
+    if not success:
+        break
+    frame.flags.writeable = False
+    # Inference resolution is set by the preset (detector.scale).
+    # frame = cv.flip(frame, 1)
+
+    img = scheduler.findHands(frame, draw = False)
+    img.flags.writeable = True
+    drawSkeletons(img, detector.pixelCoords(img))
+    detector.findPosition(frame, 2)
+
+    # img = cv.flip(img, 1)
+
+    # -----------------------------FPS Calculations:
+    ctime = time.time()
+    fps = 1 / (ctime-ptime) if ptime and ctime > ptime else 0
+    ptime = ctime
+
+    drawFeatures(img, frame, fps)
+
+    # -----------------------------Displaying
+    cv.imshow('Video', img)
+    pool.release(frame)
+
+    KEY = cv.waitKey(5)
+    handleKey(KEY)
+
     # -----------------------------Exit Condition
     if KEY == 27:     # ESC to break
         break
 
 # ----------------------------- OpenCV release & destroy
 cap.release()
-cv.destroyAllWindows()
\ No newline at end of file
+cv.destroyAllWindows()
@@ -0,0 +1,282 @@
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import cv2 as cv
+
+import handModule as hm
+from pipeline import FrameQueue
+
+
+class SyntheticSource():
+    """SyntheticSource()
+
+    Stands in for a camera during testing, produces random frames at a fixed rate.
+
+    Args:
+        width:  frame width
+        height: frame height
+        fps:    frames per second, None produces them as fast as possible
+        frames: number of frames before the source ends, None runs forever
+        seed:   seed for the random frames
+    """
+    def __init__(self, width = 640, height = 480, fps = 30, frames = None, seed = 0):
+        rng = np.random.default_rng(seed)
+        self.images = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+        self.fps = fps
+        self.frames = frames
+        self.count = 0
+        self.next = time.perf_counter()
+
+    def read(self, image = None):
+        if self.frames is not None and self.count >= self.frames:
+            return False, None
+
+        if self.fps:
+            self.next += 1 / self.fps
+            delay = self.next - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        self.count += 1
+        frame = self.images[self.count % len(self.images)]
+
+        # Like cv.VideoCapture.read(), write into image when it fits.
+        if image is not None and image.shape == frame.shape:
+            image[...] = frame
+            return True, image
+
+        return True, frame.copy()
+
+    def release(self):
+        pass
+
+
+def openSource(spec):
+    """openSource()
+
+    Args:
+        spec:   camera index, video file path, "synthetic", or any object with
+                read() and release() like cv.VideoCapture
+    Returns:
+        a frame source with read() and release()
+    """
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return cv.VideoCapture(int(spec))
+    if spec == "synthetic":
+        return SyntheticSource()
+    if isinstance(spec, str):
+        return cv.VideoCapture(spec)
+
+    return spec
+
+
+class Stream():
+    """Stream()
+
+    One camera and its own tracking HandDetector. The reader thread keeps
+    only the newest frame, older frames are dropped (backpressure).
+
+    Args:
+        name:           name used in the stats
+        source:         see openSource()
+        detectorArgs:   passed on to HandDetector()
+    """
+    def __init__(self, name, source, detectorArgs):
+        self.name = name
+        self.source = openSource(source)
+        self.detector = hm.HandDetector(**detectorArgs)
+        self.frames = FrameQueue(1)
+
+        self.busy = False
+        self.ended = False
+        self.captured = 0
+        self.processed = 0
+        self.times = deque()
+        self.timesLock = threading.Lock()
+
+    def fps(self):
+        """fps()
+
+        Returns:
+            float: processed frames per second over the last second
+        """
+        now = time.perf_counter()
+        with self.timesLock:
+            times = tuple(self.times)
+
+        return float(sum(1 for t in times if now - t < 1))
+
+
+class MultiStreamServer():
+    """MultiStreamServer()
+
+    Serves many streams from one process. Every stream keeps its own tracking
+    HandDetector, inference runs on a shared thread pool (Mediapipe releases
+    the GIL while processing). Streams are scheduled round-robin with at most
+    one frame in flight per stream, so a fast camera can't starve the others.
+    An exception during inference or in onResult stops the server and is
+    raised again by isRunning().
+
+    Args:
+        sources:        list of sources, see openSource()
+        workers:        inference threads, defaults to the number of streams
+        onResult:       optional function called with (stream, timestamp) after
+                        each frame, stream.detector holds that frame's landmarks
+        detectorArgs:   passed on to each stream's HandDetector()
+    """
+    def __init__(self, sources, workers = None, onResult = None, **detectorArgs):
+        self.streams = [Stream("stream" + str(i), source, detectorArgs) for i, source in enumerate(sources)]
+        self.workers = workers or len(self.streams)
+        self.onResult = onResult
+
+        self.pool = ThreadPoolExecutor(self.workers)
+        self.slots = threading.Semaphore(self.workers)
+        self.wake = threading.Event()
+        self.running = threading.Event()
+        self.next = 0
+        self.threads = []
+        self.error = None
+
+    def start(self):
+        self.running.set()
+        for stream in self.streams:
+            thread = threading.Thread(target = self._read, args = (stream,), daemon = True)
+            thread.start()
+            self.threads.append(thread)
+
+        thread = threading.Thread(target = self._schedule, daemon = True)
+        thread.start()
+        self.threads.append(thread)
+
+        return self
+
+    def stop(self):
+        self.running.clear()
+        self.wake.set()
+        for thread in self.threads:
+            thread.join()
+
+        self.pool.shutdown()
+        for stream in self.streams:
+            stream.source.release()
+
+    def isRunning(self):
+        if self.error is not None:
+            raise self.error
+
+        return self.running.is_set() and not all(stream.ended and stream.frames.queue.empty() and not stream.busy for stream in self.streams)
+
+    def _read(self, stream):
+        while self.running.is_set():
+            success, frame = stream.source.read()
+            if not success:
+                stream.ended = True
+                break
+
+            stream.captured += 1
+            stream.frames.put((time.perf_counter(), frame))
+            self.wake.set()
+
+        self.wake.set()
+
+    def _schedule(self):
+        while self.running.is_set():
+            if not self.slots.acquire(timeout = 0.1):
+                continue
+
+            stream, item = self._pick()
+            if stream is None:
+                self.slots.release()
+                self.wake.wait(0.01)
+                self.wake.clear()
+                continue
+
+            self.pool.submit(self._infer, stream, item).add_done_callback(self._done)
+
+    def _done(self, future):
+        # A failed frame would otherwise vanish with its future.
+        if future.cancelled() or future.exception() is None:
+            return
+
+        if self.error is None:
+            self.error = future.exception()
+        self.running.clear()
+        self.wake.set()
+
+    def _pick(self):
+        # Round-robin, starting after the last stream that got a slot.
+        count = len(self.streams)
+        for k in range(count):
+            ind = (self.next + k) % count
+            stream = self.streams[ind]
+            if stream.busy:
+                continue
+
+            # Marked busy before taking the frame, so isRunning() never sees
+            # a stream with neither a queued nor an in-flight frame.
+            stream.busy = True
+            item = stream.frames.get(0)
+            if item is not None:
+                self.next = ind + 1
+                return stream, item
+            stream.busy = False
+
+        return None, None
+
+    def _infer(self, stream, item):
+        stamp, frame = item
+        try:
+            stream.detector.setResults(stream.detector.process(frame))
+            stream.processed += 1
+
+            now = time.perf_counter()
+            with stream.timesLock:
+                stream.times.append(now)
+                while now - stream.times[0] > 1:
+                    stream.times.popleft()
+
+            if self.onResult is not None:
+                self.onResult(stream, stamp)
+        finally:
+            stream.busy = False
+            self.slots.release()
+            self.wake.set()
+
+    def stats(self):
+        """stats()
+
+        Returns:
+            dict: for each stream, the fps, captured, processed and dropped frame counts.
+        """
+        return {
+            stream.name: {
+                "fps": stream.fps(),
+                "captured": stream.captured,
+                "processed": stream.processed,
+                "dropped": stream.frames.dropped,
+            }
+            for stream in self.streams
+        }
+
+
+# ----------------------------- Main
+def main():
+    sources = sys.argv[1:] or ["0"]
+    server = MultiStreamServer(sources).start()
+
+    try:
+        while server.isRunning():
+            time.sleep(1)
+            for name, stats in server.stats().items():
+                print(name + ": " + str(int(stats["fps"])) + " fps, " + str(stats["processed"]) + " processed, " + str(stats["dropped"]) + " dropped")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
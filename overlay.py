@@ -0,0 +1,148 @@
+import numpy as np
+import cv2 as cv
+
+
+# HAND_CONNECTIONS as 6 polylines: thumb, index, middle, ring, pinky and the palm.
+HAND_CHAINS = [
+    [0, 1, 2, 3, 4],
+    [0, 5, 6, 7, 8],
+    [9, 10, 11, 12],
+    [13, 14, 15, 16],
+    [0, 17, 18, 19, 20],
+    [5, 9, 13, 17],
+]
+
+# Same look as HandDetector.drawHands().
+LANDMARK_COLOR = (207, 252, 3)
+CONNECTION_COLOR = (255, 255, 255)
+
+
+def drawSkeletons(img, pixels, thickness = 5, radius = 3):
+    """drawSkeletons()
+
+    Draws every hand in two calls: one cv.polylines for all the bones and
+    one for all the joints.
+
+    Args:
+        img:        image to draw on
+        pixels:     (hands, 21, 2) pixel coordinates, see HandDetector.pixelCoords()
+        thickness:  bone thickness
+        radius:     joint radius
+    Returns:
+        img
+    """
+    if len(pixels) == 0:
+        return img
+
+    pixels = np.ascontiguousarray(pixels, dtype=np.int32)
+    bones = [pixels[hand, chain] for hand in range(len(pixels)) for chain in HAND_CHAINS]
+    cv.polylines(img, bones, False, CONNECTION_COLOR, thickness, cv.LINE_AA)
+
+    return drawPoints(img, pixels.reshape(-1, 2), LANDMARK_COLOR, radius)
+
+
+def drawPoints(img, points, color, radius):
+    """drawPoints()
+
+    Draws filled dots at all points in one call. A zero-length polyline is
+    drawn as a round dot with the line thickness as its diameter.
+
+    Args:
+        img:    image to draw on
+        points: (n, 2) pixel coordinates
+        color:  BGR color
+        radius: dot radius
+    Returns:
+        img
+    """
+    if len(points) == 0:
+        return img
+
+    points = np.asarray(points, dtype=np.int32).reshape(-1, 1, 2)
+    dots = np.ascontiguousarray(np.repeat(points, 2, axis=1))
+    cv.polylines(img, list(dots), False, color, 2 * radius + 1, cv.LINE_AA)
+
+    return img
+
+
+class OverlayRenderer():
+    """OverlayRenderer()
+
+    Caches static overlays (like the menu) as pre-rendered layers, so each
+    frame only blends them in instead of drawing the text again.
+    """
+    def __init__(self):
+        self.layers = {}
+
+    def layer(self, key, shape, draw):
+        """layer()
+
+        Args:
+            key:    name of the layer, it's rendered once per key and image shape
+            shape:  image shape
+            draw:   function drawing the layer onto the blank image it's given
+        Returns:
+            tuple: (pixels, mask, bounding box) of the cached layer
+        """
+        cached = self.layers.get(key)
+        if cached is not None and cached[0] == shape:
+            return cached[1]
+
+        canvas = np.zeros(shape, dtype=np.uint8)
+        draw(canvas)
+        mask = canvas.any(axis=2).astype(np.uint8)
+
+        # Only the area that was drawn on needs blending.
+        ys, xs = np.nonzero(mask)
+        if len(ys) == 0:
+            box = (0, 0, 0, 0)
+        else:
+            box = (ys.min(), ys.max() + 1, xs.min(), xs.max() + 1)
+        y0, y1, x0, x1 = box
+
+        rendered = (canvas[y0:y1, x0:x1].copy(), mask[y0:y1, x0:x1].copy(), box)
+        self.layers[key] = (shape, rendered)
+
+        return rendered
+
+    def blend(self, img, key, draw, opacity = 1.0):
+        """blend()
+
+        Blends a cached layer onto img, rendering it first if needed.
+
+        Args:
+            img:        image to draw on
+            key:        name of the layer
+            draw:       function drawing the layer, see layer()
+            opacity:    0 to 1, how much of the layer covers img
+        Returns:
+            img
+        """
+        pixels, mask, (y0, y1, x0, x1) = self.layer(key, img.shape, draw)
+        roi = img[y0:y1, x0:x1]
+
+        if opacity < 1.0:
+            pixels = cv.addWeighted(pixels, opacity, roi, 1 - opacity, 0)
+
+        cv.copyTo(pixels, mask, roi)
+
+        return img
+
+    def menu(self, img, lines, origin = (50, 100), step = 50):
+        """menu()
+
+        Blends a cached block of text lines onto img.
+
+        Args:
+            img:    image to draw on
+            lines:  list of strings
+            origin: position of the first line
+            step:   pixels between lines
+        Returns:
+            img
+        """
+        def draw(canvas):
+            for ind, text in enumerate(lines):
+                cv.putText(canvas, text, (origin[0], origin[1] + ind * step), cv.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
+
+        return self.blend(img, ("menu", tuple(lines), origin, step), draw)
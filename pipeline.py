@@ -0,0 +1,255 @@
+import threading
+import queue
+import time
+from collections import deque
+
+
+class FrameQueue():
+    """FrameQueue()
+
+    A bounded queue that drops the oldest item instead of blocking when full,
+    so a slow stage always gets the most recent frame.
+
+    Args:
+        maxsize:    items kept
+        onDrop:     called with every item that is thrown away
+    """
+    def __init__(self, maxsize = 1, onDrop = None):
+        self.queue = queue.Queue(maxsize)
+        self.onDrop = onDrop
+        self.added = 0
+        self.dropped = 0
+
+    def put(self, item):
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                self.added += 1
+                return
+            except queue.Full:
+                # Throw away the stale frame and try again.
+                try:
+                    stale = self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    continue
+                if self.onDrop is not None:
+                    self.onDrop(stale)
+
+    def get(self, timeout = None):
+        """get()
+
+        Args:
+            timeout:    seconds to wait, None waits forever
+        Returns:
+            the oldest item, or None if the timeout ran out.
+        """
+        try:
+            return self.queue.get(timeout = timeout)
+        except queue.Empty:
+            return None
+
+
+class Stage(threading.Thread):
+    """Stage()
+
+    A pipeline stage running on its own thread. Every item from inQueue is
+    passed to func and the return value is put on outQueue. A stage without
+    inQueue is a source and calls func() repeatedly, returning None ends it.
+    An exception in func ends the stage, it's kept in self.error and
+    onError is called.
+
+    Args:
+        name:       name used in the latency report
+        func:       function to run on each item
+        inQueue:    FrameQueue to read from (None for a source)
+        outQueue:   FrameQueue to write to
+        window:     number of frames the latency is averaged over
+        onError:    called without arguments when func raised
+    """
+    def __init__(self, name, func, inQueue, outQueue, window = 30, onError = None):
+        super().__init__(name = name, daemon = True)
+        self.func = func
+        self.onError = onError
+        self.error = None
+        self.inQueue = inQueue
+        self.outQueue = outQueue
+        self.times = deque(maxlen = window)
+        self.running = threading.Event()
+        self.running.set()
+        self.finished = 0
+
+    def run(self):
+        while self.running.is_set():
+            item = None
+            if self.inQueue is not None:
+                item = self.inQueue.get(timeout = 0.1)
+                if item is None:
+                    continue
+
+            start = time.perf_counter()
+            try:
+                out = self.func() if self.inQueue is None else self.func(item)
+            except Exception as error:
+                self.error = error
+                self.running.clear()
+                if self.onError is not None:
+                    self.onError()
+                break
+            self.times.append(time.perf_counter() - start)
+
+            if out is None:
+                if self.inQueue is None:
+                    self.running.clear()
+                self.finished += 1
+                continue
+
+            self.outQueue.put(out)
+            self.finished += 1
+
+    def stop(self):
+        self.running.clear()
+
+    def latency(self):
+        """latency()
+
+        Returns:
+            float: average time spent in func in milliseconds.
+        """
+        if not self.times:
+            return 0.0
+
+        return 1000 * sum(self.times) / len(self.times)
+
+
+class Pipeline():
+    """Pipeline()
+
+    Capture -> inference pipeline connected by FrameQueues. Capture and
+    inference run on worker threads, the caller renders and displays the
+    packets returned by get() on its own (usually the main/GUI) thread.
+    With a pool, the caller has to release() every packet's frame once it's
+    drawn, capture waits for a free buffer otherwise. An exception in a stage
+    stops the pipeline and is raised again by isRunning() and get().
+
+    Args:
+        cap:        cv.VideoCapture or anything with a read() method
+        detector:   HandDetector, only detector.process() is called from the
+                    inference thread
+        queueSize:  size of the queues between the stages
+        pool:       optional framepool.FramePool to capture into, with a buffer
+                    for every frame alive at once (2 * queueSize + 3)
+    """
+    def __init__(self, cap, detector, queueSize = 1, pool = None):
+        self.cap = cap
+        self.detector = detector
+        self.pool = pool
+
+        # Frames dropped as stale go straight back to the pool.
+        onDrop = self._drop if pool is not None else None
+        self.frames = FrameQueue(queueSize, onDrop)
+        self.packets = FrameQueue(queueSize, onDrop)
+
+        self.capture = Stage("capture", self._capture, None, self.frames, onError = self._failed)
+        self.inference = Stage("inference", self._inference, self.frames, self.packets, onError = self._failed)
+        self.renderTimes = deque(maxlen = 30)
+
+    def _capture(self):
+        if self.pool is not None:
+            buffer = None
+            if self.pool.buffers is not None:
+                # Wait until the renderer or a queue gives a buffer back,
+                # stop() ends the wait.
+                while buffer is None:
+                    if not self.capture.running.is_set():
+                        return None
+                    buffer = self.pool.acquire(timeout = 0.1)
+            success, frame = self.pool.read(self.cap, buffer)
+        else:
+            success, frame = self.cap.read()
+        if not success:
+            return None
+
+        frame.flags.writeable = False
+        return (time.perf_counter(), frame)
+
+    def _drop(self, item):
+        self.pool.release(item[1])
+
+    def release(self, frame):
+        """release()
+
+        Hands a packet's frame back to the pool once it's drawn and displayed.
+        """
+        if self.pool is not None:
+            self.pool.release(frame)
+
+    def _inference(self, item):
+        stamp, frame = item
+        return (stamp, frame, self.detector.process(frame))
+
+    def start(self):
+        self.capture.start()
+        self.inference.start()
+        return self
+
+    def stop(self):
+        self.capture.stop()
+        self.inference.stop()
+        self.capture.join()
+        self.inference.join()
+
+    def _failed(self):
+        # One stage died, the other one has nothing left to do.
+        self.capture.stop()
+        self.inference.stop()
+
+    def _raiseError(self):
+        for stage in (self.capture, self.inference):
+            if stage.error is not None:
+                raise stage.error
+
+    def isRunning(self):
+        self._raiseError()
+
+        # Capture ended, but there may still be frames on their way to the caller.
+        # A frame counts as finished only after it reached the packets queue.
+        inFlight = self.frames.added - self.frames.dropped - self.inference.finished
+        return self.capture.running.is_set() or inFlight > 0 or not self.packets.queue.empty()
+
+    def get(self, timeout = 0.1):
+        """get()
+
+        Args:
+            timeout:    seconds to wait for a new packet
+        Returns:
+            tuple: (capture timestamp, frame, Mediapipe results) of the newest
+                   processed frame, or None if nothing arrived in time.
+        """
+        self._raiseError()
+        return self.packets.get(timeout)
+
+    def renderTime(self, seconds):
+        """renderTime()
+
+        Records the time the caller spent rendering a packet, so it shows up
+        in stats() next to the other stages.
+        """
+        self.renderTimes.append(seconds)
+
+    def stats(self):
+        """stats()
+
+        Returns:
+            dict: average latency in milliseconds of each stage and the number
+                  of stale frames dropped in front of each stage.
+        """
+        render = 1000 * sum(self.renderTimes) / len(self.renderTimes) if self.renderTimes else 0.0
+
+        return {
+            "capture": self.capture.latency(),
+            "inference": self.inference.latency(),
+            "render": render,
+            "droppedCapture": self.frames.dropped,
+            "droppedInference": self.packets.dropped,
+        }
@@ -0,0 +1,101 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import handModule as hm
+from detectorpool import warmUp
+
+
+# Field names match the HandDetector() arguments they set.
+Preset = namedtuple("Preset", "modelComplexity scale detectionCon trackCon")
+
+PRESETS = {
+    "latency": Preset(modelComplexity = 0, scale = 0.5, detectionCon = 0.5, trackCon = 0.5),
+    "balanced": Preset(modelComplexity = 1, scale = 0.75, detectionCon = 0.6, trackCon = 0.5),
+    "accuracy": Preset(modelComplexity = 1, scale = 1.0, detectionCon = 0.75, trackCon = 0.6),
+}
+
+# Most accurate first, autoTune() takes the first one fast enough.
+PRESET_ORDER = ["accuracy", "balanced", "latency"]
+
+
+def createDetector(preset = "balanced", **detectorArgs):
+    """createDetector()
+
+    Args:
+        preset:         name in PRESETS or a Preset
+        detectorArgs:   other HandDetector() arguments, they override the preset
+    Returns:
+        HandDetector: detector set up with the preset
+    """
+    if isinstance(preset, str):
+        preset = PRESETS[preset]
+
+    return hm.HandDetector(**dict(preset._asdict(), **detectorArgs))
+
+
+def measureFps(detector, frames, runs = 30):
+    """measureFps()
+
+    Args:
+        detector:   HandDetector to time, warmed up
+        frames:     BGR frames to run on in turn, ideally from the camera
+        runs:       frames to time
+    Returns:
+        float: frames per second of findHands() without drawing
+    """
+    start = time.perf_counter()
+    for ind in range(runs):
+        detector.findHands(frames[ind % len(frames)], draw = False)
+    elapsed = time.perf_counter() - start
+
+    return runs / elapsed if elapsed > 0 else float("inf")
+
+
+def autoTune(frames, targetFps = 30, presets = PRESET_ORDER, runs = 30, **detectorArgs):
+    """autoTune()
+
+    Measures every preset on this machine and picks the most accurate one
+    that still reaches targetFps, or the fastest one when none does.
+
+    Args:
+        frames:         BGR frame or list of frames to measure on, ideally from the camera
+        targetFps:      frames per second the detector has to reach
+        presets:        names to try, most accurate first
+        runs:           frames timed per preset
+        detectorArgs:   other HandDetector() arguments, e.g. maxHands
+    Returns:
+        tuple: (name of the chosen preset, its detector (warm and reset),
+                dict of measured fps per preset), the other detectors are closed
+    """
+    if isinstance(frames, np.ndarray):
+        frames = [frames]
+
+    measured = {}
+    chosen = None
+    fastest = None
+    candidates = []
+
+    for name in presets:
+        detector = createDetector(name, **detectorArgs)
+        candidates.append(detector)
+        warmUp(detector, frames[0].shape)
+        measured[name] = measureFps(detector, frames, runs)
+        detector.reset()
+
+        if fastest is None or measured[name] > measured[fastest[0]]:
+            fastest = (name, detector)
+
+        if measured[name] >= targetFps:
+            chosen = (name, detector)
+            break
+
+    name, detector = chosen if chosen is not None else fastest
+
+    # Every candidate holds a Mediapipe graph, keep only the chosen one.
+    for candidate in candidates:
+        if candidate is not detector:
+            candidate.close()
+
+    return name, detector, measured
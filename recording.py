@@ -0,0 +1,131 @@
+import os
+import struct
+
+import numpy as np
+
+import handModule as hm
+
+
+# File layout: a fixed size header followed by an array of fixed size records.
+#   header:  magic (4s), version (u2), maxHands (u2), reserved (8x)
+#   record:  see recordDtype()
+MAGIC = b"HLMK"
+VERSION = 1
+HEADER = struct.Struct("<4sHH8x")
+
+# Handedness is stored as a small code per hand slot.
+HANDEDNESS_CODES = {"Left": 1, "Right": 2}
+HANDEDNESS_LABELS = {1: "Left", 2: "Right"}
+
+
+def recordDtype(maxHands):
+    """recordDtype()
+
+    Args:
+        maxHands:   number of hand slots per record
+    Returns:
+        np.dtype: the structured dtype of one frame record
+    """
+    return np.dtype([
+        ("timestamp", "<f8"),
+        ("hands", "u1"),
+        ("handedness", "u1", (maxHands,)),
+        ("landmarks", "<f4", (maxHands, hm.NUM_LANDMARKS, 3)),
+    ])
+
+
+class LandmarkRecorder():
+    """LandmarkRecorder()
+
+    Streams per-frame landmarks into a fixed-record binary file that can be
+    replayed with LandmarkReader. Hands beyond maxHands are not recorded.
+
+    Args:
+        path:       file to write
+        maxHands:   number of hand slots per record
+    """
+    def __init__(self, path, maxHands = 2):
+        self.maxHands = maxHands
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, maxHands))
+
+        # One record, reused for every frame.
+        self.record = np.zeros(1, dtype = recordDtype(maxHands))
+
+    def write(self, timestamp, landmarks, handedness):
+        """write()
+
+        Args:
+            timestamp:  frame time in seconds
+            landmarks:  (hands, 21, 3) landmark array
+            handedness: list of "Left" / "Right" labels
+        """
+        hands = min(len(landmarks), self.maxHands)
+
+        rec = self.record[0]
+        rec["timestamp"] = timestamp
+        rec["hands"] = hands
+        rec["handedness"] = 0
+        rec["landmarks"] = 0
+        rec["landmarks"][:hands] = landmarks[:hands]
+        for i in range(hands):
+            rec["handedness"][i] = HANDEDNESS_CODES.get(handedness[i], 0)
+
+        self.file.write(self.record.tobytes())
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class LandmarkReader():
+    """LandmarkReader()
+
+    Memory-maps a file written by LandmarkRecorder, so frames can be replayed
+    without loading or copying the whole recording.
+
+    Args:
+        path:   file to read
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, maxHands = HEADER.unpack(f.read(HEADER.size))
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(path + " is not a landmark recording")
+
+        self.maxHands = maxHands
+        dtype = recordDtype(maxHands)
+
+        # A recording that was killed can end in a partial record, it's left
+        # out. An empty file can't be memory-mapped.
+        count = (os.path.getsize(path) - HEADER.size) // dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype = dtype, mode = "r", offset = HEADER.size, shape = (count,))
+        else:
+            self.records = np.zeros(0, dtype = dtype)
+
+        # Views into the memory map, one row per frame.
+        self.timestamps = self.records["timestamp"]
+        self.hands = self.records["hands"]
+        self.handedness = self.records["handedness"]
+        self.landmarks = self.records["landmarks"]
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, ind):
+        """Returns (timestamp, landmarks, handedness) of frame ind."""
+        hands = int(self.hands[ind])
+        handedness = [HANDEDNESS_LABELS.get(int(code), "Unknown") for code in self.handedness[ind, :hands]]
+
+        return float(self.timestamps[ind]), self.landmarks[ind, :hands], handedness
+
+    def __iter__(self):
+        for ind in range(len(self)):
+            yield self[ind]
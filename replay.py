@@ -0,0 +1,149 @@
+import numpy as np
+
+import handModule as hm
+from recording import LandmarkReader
+
+
+# Rough open right hand in normalized coordinates, wrist at the bottom.
+# Index order follows https://google.github.io/mediapipe/images/mobile/hand_landmarks.png
+OPEN_HAND = np.array([
+    (0.0, 0.2),
+    (-0.05, 0.15), (-0.09, 0.1), (-0.12, 0.05), (-0.14, 0.01),
+    (-0.04, 0.05), (-0.045, -0.03), (-0.05, -0.08), (-0.055, -0.12),
+    (0.0, 0.04), (0.0, -0.05), (0.0, -0.1), (0.0, -0.14),
+    (0.035, 0.05), (0.04, -0.03), (0.045, -0.08), (0.05, -0.12),
+    (0.07, 0.07), (0.08, 0.01), (0.085, -0.03), (0.09, -0.06),
+], dtype=np.float32)
+
+# Landmarks that curl towards the palm when making a fist, and how far.
+FINGER_POINTS = [2, 3, 4, 6, 7, 8, 10, 11, 12, 14, 15, 16, 18, 19, 20]
+CURL = np.array([0.4, 0.7, 0.95] * 5, dtype=np.float32)[:, None]
+
+
+def frame(width = 1280, height = 920):
+    """frame()
+
+    The gesture methods only read img.shape, so replay can pass an image
+    without any pixels.
+
+    Args:
+        width:  image width
+        height: image height
+    Returns:
+        np.ndarray: an empty (height, width, 0) image
+    """
+    return np.empty((height, width, 0), dtype=np.uint8)
+
+
+class ArraySource():
+    """ArraySource()
+
+    Feeds landmark arrays into a HandDetector instead of Mediapipe.
+
+    Args:
+        landmarks:  (frames, hands, 21, 3) array
+        hands:      number of valid hands in each frame, defaults to all
+        handedness: list with the labels of each frame, defaults to "Right"
+        loop:       start over at the end instead of stopping
+    """
+    def __init__(self, landmarks, hands = None, handedness = None, loop = False):
+        self.landmarks = landmarks
+        self.hands = hands
+        self.handedness = handedness
+        self.loop = loop
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def frame(self, ind):
+        hands = self.landmarks.shape[1] if self.hands is None else int(self.hands[ind])
+        if self.handedness is None:
+            handedness = ["Right"] * hands
+        else:
+            handedness = self.handedness[ind][:hands]
+
+        return self.landmarks[ind, :hands], handedness
+
+    def __iter__(self):
+        while True:
+            for ind in range(len(self)):
+                yield self.frame(ind)
+
+            if not self.loop or len(self) == 0:
+                return
+
+
+class RecordingSource(ArraySource):
+    """RecordingSource()
+
+    Feeds a file written by recording.LandmarkRecorder into a HandDetector,
+    the frames are read straight from the memory map.
+
+    Args:
+        path:   recording to replay
+        loop:   start over at the end instead of stopping
+    """
+    def __init__(self, path, loop = False):
+        self.reader = LandmarkReader(path)
+        super().__init__(self.reader.landmarks, self.reader.hands, loop = loop)
+
+    def frame(self, ind):
+        timestamp, landmarks, handedness = self.reader[ind]
+        return landmarks, handedness
+
+
+def syntheticHands(frames, hands = 1, period = 30, seed = 0):
+    """syntheticHands()
+
+    Generates hands moving around the frame that close into a fist and open
+    again every period frames, enough to trigger every gesture method.
+
+    Args:
+        frames: number of frames
+        hands:  hands per frame
+        period: frames between grab and release
+        seed:   seed for the landmark noise
+    Returns:
+        ArraySource: the generated frames
+    """
+    rng = np.random.default_rng(seed)
+
+    t = np.arange(frames, dtype=np.float32)
+    offsets = np.arange(hands, dtype=np.float32)
+
+    # Every hand moves on its own circle around the middle of the frame.
+    angle = t[:, None] * 0.05 + offsets[None, :] * np.pi / max(hands, 1)
+    center = np.stack((0.5 + 0.25 * np.cos(angle), 0.5 + 0.25 * np.sin(angle)), axis=2)
+
+    # Curl the fingers towards the palm while grabbing.
+    grab = ((t // period) % 2 == 1).astype(np.float32)[:, None, None, None]
+    palm = OPEN_HAND[[0, 5, 9, 13, 17]].mean(axis=0)
+    shape = np.broadcast_to(OPEN_HAND, (frames, hands, hm.NUM_LANDMARKS, 2)).copy()
+    shape[:, :, FINGER_POINTS] += CURL * grab * (palm - shape[:, :, FINGER_POINTS])
+
+    landmarks = np.zeros((frames, hands, hm.NUM_LANDMARKS, 3), dtype=np.float32)
+    landmarks[..., :2] = center[:, :, None, :] + shape
+    landmarks[..., :2] += rng.normal(0, 0.001, (frames, hands, hm.NUM_LANDMARKS, 2))
+    landmarks[..., 2] = rng.normal(0, 0.01, (frames, hands, hm.NUM_LANDMARKS))
+
+    handedness = [["Right", "Left"][:hands] + ["Right"] * (hands - 2)] * frames
+
+    return ArraySource(landmarks, handedness = handedness)
+
+
+def replay(detector, source):
+    """replay()
+
+    Sets the detector's landmarks to each frame of source in turn, so the
+    gesture methods can run without Mediapipe or a camera.
+
+    Args:
+        detector:   HandDetector
+        source:     ArraySource, RecordingSource or any iterable of
+                    (landmarks, handedness)
+    Returns:
+        generator: yields the frame index after each frame is set
+    """
+    for ind, (landmarks, handedness) in enumerate(source):
+        detector.setLandmarks(landmarks, handedness)
+        yield ind
@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class RoiDetector():
+    """RoiDetector()
+
+    Drop-in replacement for detector.findHands() that only feeds the part of
+    the frame around the tracked hands to Mediapipe. The previous frame's
+    landmark bounding boxes are merged and padded into one crop, which is
+    color-converted and processed instead of the whole frame. Landmarks are
+    mapped back to full-frame coordinates, so findPosition(), center_of_mass()
+    and the drawing work in the same pixel space as before.
+
+    The whole frame is processed every refresh frames (to pick up new hands)
+    and whenever the crop loses the hands.
+
+    In tracking mode (mode = False) Mediapipe tracks hands in the coordinates
+    of its input image, so the crop is kept still while the hands stay well
+    inside it, and Mediapipe is reset whenever its input region changes.
+
+    Args:
+        detector:   HandDetector to run
+        padding:    padding around the hands, as a fraction of their box size
+        refresh:    frames between full-frame detections
+        minSize:    smallest crop, as a fraction of the frame size
+    """
+    def __init__(self, detector, padding = 0.5, refresh = 30, minSize = 0.25):
+        self.detector = detector
+        self.padding = padding
+        self.refresh = refresh
+        self.minSize = minSize
+
+        # Crop in normalized (x0, y0, x1, y1), None for the whole frame.
+        self.box = None
+        self.lastInput = None
+        self.sinceFull = 0
+
+        self.counts = {"full": 0, "cropped": 0, "fallback": 0}
+
+    def findHands(self, img, draw = True):
+        detector = self.detector
+
+        if self.box is None or self.sinceFull >= self.refresh:
+            results = self._full(img)
+        else:
+            results = self._crop(img)
+            if not results.multi_hand_landmarks:
+                # Tracking lost inside the crop, look at the whole frame again.
+                self.counts["fallback"] += 1
+                results = self._full(img)
+
+        detector.setResults(results)
+        self._updateBox()
+
+        if draw:
+            detector.drawHands(img)
+
+        return img
+
+    def _process(self, img, box):
+        # Tracking state is in the coordinates of the previous input region.
+        if box != self.lastInput and not self.detector.mode:
+            self.detector.hands.reset()
+        self.lastInput = box
+
+        return self.detector.process(img)
+
+    def _full(self, img):
+        self.box = None
+        self.sinceFull = 0
+        self.counts["full"] += 1
+
+        return self._process(img, None)
+
+    def _crop(self, img):
+        h, w = img.shape[:2]
+        x0, y0, x1, y1 = self.box
+        px0, py0 = int(x0 * w), int(y0 * h)
+        px1, py1 = max(int(x1 * w), px0 + 1), max(int(y1 * h), py0 + 1)
+
+        # Slicing is a view, no pixels are copied before cvtColor.
+        results = self._process(img[py0:py1, px0:px1], self.box)
+        self.sinceFull += 1
+        self.counts["cropped"] += 1
+
+        # Map the crop's normalized landmarks back to the full frame.
+        sx, sy = (px1 - px0) / w, (py1 - py0) / h
+        ox, oy = px0 / w, py0 / h
+        for hand in results.multi_hand_landmarks or []:
+            for lm in hand.landmark:
+                lm.x = ox + lm.x * sx
+                lm.y = oy + lm.y * sy
+
+        return results
+
+    def _updateBox(self):
+        landmarks = self.detector.landmarks
+        if len(landmarks) == 0:
+            self.box = None
+            return
+
+        xy = landmarks[:, :, :2].reshape(-1, 2)
+        low, high = xy.min(axis=0), xy.max(axis=0)
+
+        # Keep the current crop while the hands stay inside its inner half padding,
+        # so Mediapipe keeps tracking in the same coordinates.
+        if self.box is not None:
+            margin = (high - low) * self.padding / 2
+            x0, y0, x1, y1 = self.box
+            if (low - margin >= (x0, y0)).all() and (high + margin <= (x1, y1)).all():
+                return
+
+        pad = np.maximum((high - low) * self.padding, (self.minSize - (high - low)) / 2)
+        low = np.clip(low - pad, 0, 1)
+        high = np.clip(high + pad, 0, 1)
+
+        self.box = (float(low[0]), float(low[1]), float(high[0]), float(high[1]))
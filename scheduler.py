@@ -0,0 +1,99 @@
+import numpy as np
+import cv2 as cv
+
+from overlay import drawSkeletons
+
+
+class AdaptiveScheduler():
+    """AdaptiveScheduler()
+
+    Drop-in replacement for detector.findHands() that spends less inference
+    on stable hands. While the hands move less than motionThreshold per frame
+    for stableFrames frames, inference runs on a frame downscaled by scale and
+    only every (maxSkip + 1) frames, the frames in between are filled by
+    extrapolating the landmark velocity. Any motion, hand count change or grab
+    transition escalates straight back to full-rate, full-resolution inference.
+
+    Normalized landmarks don't depend on the input size, so the gesture methods
+    keep working in the pixel space of the original frame.
+
+    Args:
+        detector:           HandDetector to run
+        scale:              downscale factor for stable hands
+        maxSkip:            frames extrapolated between two inferences
+        motionThreshold:    mean normalized landmark motion per frame counted as stable
+        stableFrames:       stable frames needed before scaling back
+    """
+    def __init__(self, detector, scale = 0.5, maxSkip = 2, motionThreshold = 0.004, stableFrames = 5):
+        self.detector = detector
+        self.scale = scale
+        self.maxSkip = maxSkip
+        self.motionThreshold = motionThreshold
+        self.stableFrames = stableFrames
+
+        self.last = None
+        self.velocity = None
+        self.lastGrab = None
+        self.stable = 0
+        self.skipped = 0
+
+        self.counts = {"full": 0, "scaled": 0, "extrapolated": 0}
+
+    def findHands(self, img, draw = True):
+        # Keep full rate while a swipe is in progress, so the release is caught in time.
+        if self.stable >= self.stableFrames and not self.detector.grabbed:
+            if self.skipped < self.maxSkip:
+                self.skipped += 1
+                self._extrapolate(img, draw)
+                return img
+
+            small = cv.resize(img, None, fx = self.scale, fy = self.scale, interpolation = cv.INTER_AREA)
+            self._infer(small, self.skipped + 1)
+            self.counts["scaled"] += 1
+        else:
+            self._infer(img, 1)
+            self.counts["full"] += 1
+
+        self.skipped = 0
+
+        if draw:
+            self.detector.drawHands(img)
+
+        return img
+
+    def _infer(self, img, frames):
+        detector = self.detector
+        detector.setResults(detector.process(img))
+
+        # Unfiltered, extrapolated frames go through the detector's filter
+        # once in setLandmarks(), like inferred ones.
+        landmarks = detector.rawLandmarks
+        grab = detector._batch(img)["grab"]
+
+        if self.last is None or len(landmarks) == 0 or landmarks.shape != self.last.shape:
+            # No hands, or hands appeared or left, start over.
+            self.velocity = np.zeros_like(landmarks)
+            self.stable = 0
+        else:
+            self.velocity = (landmarks - self.last) / frames
+            motion = np.linalg.norm(self.velocity[:, :, :2], axis=2).mean()
+
+            if motion > self.motionThreshold or not np.array_equal(grab, self.lastGrab):
+                self.stable = 0
+            else:
+                self.stable += 1
+
+        self.last = landmarks
+        self.lastGrab = grab
+
+    def _extrapolate(self, img, draw):
+        detector = self.detector
+        landmarks = self.last + self.velocity * self.skipped
+
+        detector.results = None
+        detector.setLandmarks(landmarks.astype(np.float32), detector.handedness, world = detector.worldLandmarks)
+        self.counts["extrapolated"] += 1
+
+        if draw:
+            # No Mediapipe results for this frame, draw the skeleton from the array.
+            drawSkeletons(img, detector.pixelCoords(img))
@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+
+
+class RingBuffer():
+    """RingBuffer()
+
+    Fixed size buffer of the latest samples. There is no lock: each stage
+    has a single writer, which stores the sample before bumping the count,
+    and readers only take a copy.
+
+    Args:
+        size:   number of samples kept
+    """
+    def __init__(self, size = 300):
+        self.samples = np.zeros(size, dtype=np.float64)
+        self.count = 0
+
+    def append(self, value):
+        self.samples[self.count % len(self.samples)] = value
+        self.count += 1
+
+    def values(self):
+        """values()
+
+        Returns:
+            np.ndarray: copy of the samples currently held, in no particular order
+        """
+        return self.samples[:min(self.count, len(self.samples))].copy()
+
+
+class Telemetry():
+    """Telemetry()
+
+    Collects wall time per stage of a frame, see HandDetector.enableTelemetry().
+
+    Args:
+        size:       samples kept per stage for the rolling percentiles
+        callback:   optional function called with (stage, seconds) on every sample
+    """
+    def __init__(self, size = 300, callback = None):
+        self.size = size
+        self.callback = callback
+        self.stages = {}
+        self.server = None
+
+    def record(self, stage, seconds):
+        buffer = self.stages.get(stage)
+        if buffer is None:
+            buffer = self.stages.setdefault(stage, RingBuffer(self.size))
+
+        buffer.append(seconds)
+
+        if self.callback is not None:
+            self.callback(stage, seconds)
+
+    def summary(self):
+        """summary()
+
+        Returns:
+            dict: for each stage, the total sample count and the p50/p95/p99/mean
+                  of the rolling window in milliseconds.
+        """
+        ret = {}
+        for stage, buffer in list(self.stages.items()):
+            ms = buffer.values() * 1000
+            if len(ms) == 0:
+                continue
+
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            ret[stage] = {
+                "count": buffer.count,
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "mean": float(ms.mean()),
+            }
+
+        return ret
+
+    def serve(self, port = 9100, host = "127.0.0.1"):
+        """serve()
+
+        Serves summary() as JSON on http://host:port/metrics from a daemon thread.
+
+        Args:
+            port:   port to listen on
+            host:   address to bind, local only by default
+        Returns:
+            HTTPServer: the running server, stopped by stop()
+        """
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = json.dumps({"time": time.time(), "stages": telemetry.summary()}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer((host, port), Handler)
+        threading.Thread(target = self.server.serve_forever, daemon = True).start()
+
+        return self.server
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -0,0 +1,123 @@
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+import handModule as hm
+from bus import BusReader, BusWriter
+from events import GrabStart, GrabEnd, Swipe, FingerCountChanged
+from trajectory import Gesture
+
+
+@pytest.fixture
+def name(request):
+    # Unique per test and process, shared memory names are system wide.
+    return "hlmbTest" + str(os.getpid()) + request.node.name[:20]
+
+
+def hands(count, value = 0.0):
+    return np.full((count, hm.NUM_LANDMARKS, 3), value, dtype=np.float32) + np.arange(count, dtype=np.float32)[:, None, None]
+
+
+def testRoundTrip(name):
+    with BusWriter(name, maxHands = 2) as writer, BusReader(name) as reader:
+        assert reader.latest() is None
+
+        writer.publish(1.5, hands(2, 0.25), ["Left", "Right"], [4, 9])
+        timestamp, landmarks, handedness, ids = reader.read(0)
+
+        assert (timestamp, handedness, ids.tolist()) == (1.5, ["Left", "Right"], [4, 9])
+        np.testing.assert_array_equal(landmarks, hands(2, 0.25))
+
+        # Views into shared memory, they have to go before the reader closes.
+        n, timestamp, landmarks, handedness, ids = reader.latest()
+        assert (n, timestamp) == (0, 1.5)
+        np.testing.assert_array_equal(landmarks, hands(2, 0.25))
+        del landmarks, ids
+
+
+def testExtraHandsAreDropped(name):
+    with BusWriter(name, maxHands = 2) as writer, BusReader(name) as reader:
+        writer.publish(0.0, hands(3), ["Left", "Right", "Left"])
+        timestamp, landmarks, handedness, ids = reader.read(0)
+
+        np.testing.assert_array_equal(landmarks, hands(3)[:2])
+        assert ids.tolist() == [-1, -1]
+
+
+def testPollReturnsNewFramesInOrder(name):
+    with BusWriter(name, frameSlots = 8) as writer, BusReader(name) as reader:
+        for ind in range(3):
+            writer.publish(float(ind), hands(1, ind), ["Right"])
+        assert [frame[:2] for frame in reader.poll()] == [(0, 0.0), (1, 1.0), (2, 2.0)]
+
+        writer.publish(3.0, hands(1, 3), ["Right"])
+        assert [frame[0] for frame in reader.poll()] == [3]
+        assert reader.poll() == []
+        assert reader.dropped == 0
+
+
+def testLappedReaderCountsDroppedFrames(name):
+    with BusWriter(name, frameSlots = 4) as writer, BusReader(name) as reader:
+        for ind in range(10):
+            writer.publish(float(ind), hands(1, ind), ["Right"])
+
+        assert [frame[0] for frame in reader.poll()] == [6, 7, 8, 9]
+        assert reader.dropped == 6
+
+        # Overwritten frames can't be read, the slot holds frame n + 4 now.
+        assert reader.read(2) is None
+        assert not reader.valid(2)
+        assert reader.valid(6)
+
+
+def testRecordBeingWrittenIsInvalid(name):
+    with BusWriter(name, frameSlots = 4) as writer, BusReader(name) as reader:
+        writer.publish(0.0, hands(1), ["Right"])
+        writer.publish(1.0, hands(1), ["Right"])
+
+        # Odd sequence number: the writer is in the middle of frame 1.
+        writer.frames[1]["seq"] = 2 * 1 + 1
+        assert reader.read(1) is None
+        assert [frame[0] for frame in reader.poll()] == [0]
+        assert reader.dropped == 1
+
+        writer.frames[1]["seq"] = 2 * 1 + 2
+        assert reader.read(1)[0] == 1.0
+
+
+def testEventsRoundTrip(name):
+    events = [
+        GrabStart(1.0, "Right", [10, 20]),
+        GrabEnd(2.0, "Right", [30, 40]),
+        Swipe(2.0, "Right", "Left", 150.0),
+        FingerCountChanged(3.0, "Left", 2, 5),
+        Gesture(4.0, "Right", "circle", "Clockwise", 0.5, 0.9),
+        Gesture(5.0, "Left", "hold", None, 0.01, 0.8),
+    ]
+
+    with BusWriter(name) as writer, BusReader(name) as reader:
+        writer.publish(1.0, hands(1), ["Right"], events = events)
+
+        assert reader.pollEvents() == events
+        assert reader.pollEvents() == []
+
+
+def testLappedEvents(name):
+    with BusWriter(name, eventSlots = 4) as writer, BusReader(name) as reader:
+        events = [FingerCountChanged(float(ind), "Right", ind, ind - 1) for ind in range(6)]
+        writer.publish(0.0, hands(1), ["Right"], events = events)
+
+        assert reader.pollEvents() == events[2:]
+        assert reader.droppedEvents == 2
+
+
+def testReaderRejectsOtherMemory(name):
+    shm = shared_memory.SharedMemory(name, create = True, size = 1024)
+    try:
+        with pytest.raises(ValueError):
+            BusReader(name)
+    finally:
+        shm.close()
+        shm.unlink()
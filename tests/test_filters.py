@@ -0,0 +1,79 @@
+import numpy as np
+
+import handModule as hm
+from filters import OneEuroFilter
+
+
+def hands(*values):
+    # One hand per value, every landmark at that value.
+    return np.array([np.full((hm.NUM_LANDMARKS, 3), v) for v in values], dtype=np.float32)
+
+
+def testFirstFramePassesThrough():
+    landmarks = np.random.default_rng(0).random((2, hm.NUM_LANDMARKS, 3), dtype=np.float32)
+
+    np.testing.assert_array_equal(OneEuroFilter()(landmarks, 0.0), landmarks)
+
+
+def testStillHandStaysStill():
+    smooth = OneEuroFilter()
+    for ind in range(30):
+        out = smooth(hands(0.5), ind / 30)
+
+    np.testing.assert_allclose(out, hands(0.5))
+
+
+def testJitterIsSmoothed():
+    rng = np.random.default_rng(0)
+    smooth = OneEuroFilter()
+
+    raw = []
+    out = []
+    for ind in range(300):
+        landmarks = hands(0.5) + rng.normal(0, 0.003, (1, hm.NUM_LANDMARKS, 3)).astype(np.float32)
+        raw.append(landmarks)
+        out.append(smooth(landmarks, ind / 30))
+
+    assert np.std(out[30:]) < 0.5 * np.std(raw[30:])
+
+
+def testFastMotionLagsLessWithBeta():
+    # A hand moving at 1 normalized unit per second.
+    def lag(beta):
+        smooth = OneEuroFilter(beta = beta)
+        for ind in range(60):
+            out = smooth(hands(ind / 30), ind / 30)
+        return float(np.abs(hands(59 / 30) - out).max())
+
+    assert lag(10.0) < 0.02
+    assert lag(10.0) < 0.5 * lag(0.0)
+
+
+def testStateFollowsKeys():
+    smooth = OneEuroFilter()
+    smooth(hands(0.2, 0.8), 0.0, [7, 9])
+
+    # Same hands, listed the other way around.
+    out = smooth(hands(0.8, 0.2), 1 / 30, [9, 7])
+    np.testing.assert_allclose(out, hands(0.8, 0.2))
+
+
+def testNewKeyStartsAtItsLandmarks():
+    smooth = OneEuroFilter()
+    smooth(hands(0.2), 0.0, [7])
+    smooth(hands(0.3), 1 / 30, [7])
+
+    out = smooth(hands(0.3, 0.9), 2 / 30, [7, 8])
+    np.testing.assert_allclose(out[1], hands(0.9)[0])
+    assert 0.2 < out[0, 0, 0] < 0.3
+
+
+def testPredictExtrapolatesVelocity():
+    smooth = OneEuroFilter()
+    for ind in range(60):
+        out = smooth(hands(ind / 30), ind / 30)
+
+    # Closer to where the hand is 0.1 s later than the filtered landmarks.
+    future = hands(59 / 30 + 0.1)
+    assert np.abs(smooth.predict(0.1) - future).max() < 0.5 * np.abs(out - future).max()
+    assert OneEuroFilter().predict(0.1) is None
@@ -0,0 +1,85 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import handModule as hm
+import replay as rp
+
+
+# Fingertips in the order fingerCount() returns them, thumb to pinky.
+TIPS = [4, 8, 12, 16, 20]
+
+
+def hand(curled = (), center = (0.5, 0.5), scale = 1.0):
+    # replay.OPEN_HAND with the given fingers (0 = thumb) curled into the palm.
+    shape = rp.OPEN_HAND.copy()
+    palm = rp.OPEN_HAND[[0, 5, 9, 13, 17]].mean(axis=0)
+    for finger in curled:
+        joints = rp.FINGER_POINTS[3 * finger: 3 * finger + 3]
+        shape[joints] += rp.CURL[:3] * (palm - shape[joints])
+
+    ret = np.zeros((hm.NUM_LANDMARKS, 3), dtype=np.float32)
+    ret[:, :2] = shape * scale + center
+    return ret
+
+
+def expected(curled):
+    # Index to pinky first, then the thumb.
+    return [TIPS[finger] for finger in (1, 2, 3, 4, 0) if finger not in curled]
+
+
+@pytest.mark.parametrize("curled", [c for n in range(6) for c in itertools.combinations(range(5), n)])
+def testFingerCount(curled):
+    detector = hm.HandDetector(source = [])
+    detector.setLandmarks(hand(curled)[None], ["Right"])
+
+    assert detector.fingerCount(rp.frame()) == expected(curled)
+
+
+@pytest.mark.parametrize("width, height, scale", [(640, 480, 0.6), (1280, 920, 1.0), (1920, 1080, 1.6)])
+def testFingerCountIndependentOfResolution(width, height, scale):
+    detector = hm.HandDetector(source = [])
+    detector.setLandmarks(hand((0, 3, 4), scale = scale)[None], ["Right"])
+
+    assert detector.fingerCount(rp.frame(width, height)) == [8, 12]
+
+
+def testFingerCountPerHand():
+    detector = hm.HandDetector(source = [])
+    hands = np.stack((hand((), center = (0.3, 0.5)), hand((1, 2, 3, 4), center = (0.7, 0.5))))
+    detector.setLandmarks(hands, ["Right", "Left"])
+    img = rp.frame()
+
+    assert detector.fingerCount(img, 0) == expected(())
+    assert detector.fingerCount(img, 1) == [4]
+
+
+def testFingerCountWithoutHands():
+    detector = hm.HandDetector(source = [])
+    detector.setLandmarks(np.empty((0, hm.NUM_LANDMARKS, 3), dtype=np.float32), [])
+
+    assert detector.fingerCount(rp.frame()) == []
+
+
+def testFingerCountOnSyntheticHands():
+    # Open for the first period frames, then a fist.
+    detector = hm.HandDetector(source = [])
+    img = rp.frame()
+    counts = [len(detector.fingerCount(img)) for _ in rp.replay(detector, rp.syntheticHands(60, period = 30))]
+
+    assert counts[:30] == [5] * 30
+    assert counts[30:] == [0] * 30
+
+
+def testCheckGrabKeepsBaselineArguments():
+    # checkGrab(img, draw) as before handNo existed, with two hands.
+    detector = hm.HandDetector(source = [])
+    fist = hand(range(5), center = (0.3, 0.5))
+    detector.setLandmarks(np.stack((fist, hand((), center = (0.7, 0.5)))), ["Right", "Left"])
+    img = rp.frame()
+
+    assert detector.checkGrab(img, False) is True
+    assert detector.checkGrab(img, True) is True
+    assert detector.checkGrab(img, handNo = 0) is True
+    assert detector.checkGrab(img, handNo = 1) is False
@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+import pytest
+
+from framepool import FramePool
+from pipeline import Pipeline
+
+
+class Source():
+    # Endless numbered frames, like a camera.
+    def __init__(self):
+        self.count = 0
+
+    def read(self, image = None):
+        self.count += 1
+        if image is None:
+            image = np.empty((4, 4, 3), dtype=np.uint8)
+        image[...] = self.count % 256
+        return True, image
+
+
+class Detector():
+    def __init__(self, failAt = None):
+        self.failAt = failAt
+        self.calls = 0
+
+    def process(self, frame):
+        self.calls += 1
+        if self.calls == self.failAt:
+            raise RuntimeError("inference failed")
+        return int(frame[0, 0, 0])
+
+
+@pytest.mark.parametrize("pool", [None, 6])
+def testPacketsMatchTheirFrames(pool):
+    pipeline = Pipeline(Source(), Detector(), pool = FramePool(pool) if pool else None).start()
+    try:
+        packets = 0
+        while packets < 20:
+            packet = pipeline.get()
+            if packet is None:
+                continue
+            stamp, frame, results = packet
+            assert (frame == results).all()
+            pipeline.release(frame)
+            packets += 1
+    finally:
+        pipeline.stop()
+
+
+@pytest.mark.parametrize("pool", [None, 6])
+def testStageErrorStopsThePipeline(pool):
+    pipeline = Pipeline(Source(), Detector(failAt = 3), pool = FramePool(pool) if pool else None).start()
+
+    with pytest.raises(RuntimeError, match = "inference failed"):
+        deadline = time.time() + 5
+        while pipeline.isRunning() and time.time() < deadline:
+            packet = pipeline.get()
+            if packet is not None:
+                pipeline.release(packet[1])
+
+    pipeline.stop()
+    assert not pipeline.capture.is_alive()
+    with pytest.raises(RuntimeError):
+        pipeline.get()
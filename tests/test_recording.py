@@ -0,0 +1,124 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import handModule as hm
+import replay as rp
+from filters import OneEuroFilter
+from recording import LandmarkRecorder, LandmarkReader, HEADER
+
+
+def frames(count, seed = 0):
+    # Frames with 0, 1 and 2 hands in turn.
+    rng = np.random.default_rng(seed)
+    ret = []
+    for ind in range(count):
+        hands = ind % 3
+        landmarks = rng.random((hands, hm.NUM_LANDMARKS, 3), dtype=np.float32)
+        ret.append((1000.0 + ind / 30, landmarks, ["Left", "Right"][:hands]))
+    return ret
+
+
+def testRoundTrip(tmp_path):
+    path = str(tmp_path / "session.hlm")
+    written = frames(30)
+
+    with LandmarkRecorder(path, maxHands = 2) as recorder:
+        for timestamp, landmarks, handedness in written:
+            recorder.write(timestamp, landmarks, handedness)
+
+    reader = LandmarkReader(path)
+    assert len(reader) == len(written)
+    for (timestamp, landmarks, handedness), read in zip(written, reader):
+        assert read[0] == timestamp
+        np.testing.assert_array_equal(read[1], landmarks)
+        assert read[2] == handedness
+
+
+def testExtraHandsAreDropped(tmp_path):
+    path = str(tmp_path / "session.hlm")
+    landmarks = np.ones((3, hm.NUM_LANDMARKS, 3), dtype=np.float32) * [[[1]], [[2]], [[3]]]
+
+    with LandmarkRecorder(path, maxHands = 2) as recorder:
+        recorder.write(0.0, landmarks, ["Left", "Right", "Left"])
+
+    timestamp, read, handedness = LandmarkReader(path)[0]
+    np.testing.assert_array_equal(read, landmarks[:2])
+    assert handedness == ["Left", "Right"]
+
+
+def testEmptyRecording(tmp_path):
+    path = str(tmp_path / "empty.hlm")
+    LandmarkRecorder(path).close()
+
+    assert len(LandmarkReader(path)) == 0
+    assert list(LandmarkReader(path)) == []
+
+
+def testNotARecording(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"\0" * HEADER.size)
+
+    with pytest.raises(ValueError):
+        LandmarkReader(str(path))
+
+
+def results(landmarks, handedness):
+    # Mediapipe-shaped results for HandDetector.setResults().
+    point = lambda x, y, z: SimpleNamespace(x = x, y = y, z = z)
+    return SimpleNamespace(
+        multi_hand_landmarks = [SimpleNamespace(landmark = [point(*lm) for lm in hand]) for hand in landmarks],
+        multi_handedness = [SimpleNamespace(classification = [SimpleNamespace(label = label)]) for label in handedness],
+    )
+
+
+def testDetectorRecordsRawLandmarks(tmp_path):
+    # Recorded as Mediapipe returned them: not smoothed, not sorted by hand ID.
+    path = str(tmp_path / "session.hlm")
+    source = rp.syntheticHands(20, hands = 2)
+    detector = hm.HandDetector(source = [])
+    detector.setFilter(OneEuroFilter())
+
+    written = []
+    detector.startRecording(path)
+    for ind in range(len(source)):
+        landmarks, handedness = source.frame(ind)
+        if ind % 2:
+            landmarks, handedness = landmarks[::-1], handedness[::-1]
+        detector.setResults(results(landmarks, handedness))
+        written.append((landmarks, handedness))
+    detector.stopRecording()
+
+    reader = LandmarkReader(path)
+    assert len(reader) == len(written)
+    for (landmarks, handedness), (timestamp, read, readHandedness) in zip(written, reader):
+        np.testing.assert_array_equal(read, landmarks)
+        assert readHandedness == list(handedness)
+
+
+@pytest.mark.parametrize("cut", [1, 7, 100])
+def testPartialLastRecordIsIgnored(tmp_path, cut):
+    # A session killed in the middle of writing a frame.
+    path = tmp_path / "session.hlm"
+    written = frames(10)
+
+    with LandmarkRecorder(str(path), maxHands = 2) as recorder:
+        for timestamp, landmarks, handedness in written:
+            recorder.write(timestamp, landmarks, handedness)
+    path.write_bytes(path.read_bytes()[:-cut])
+
+    reader = LandmarkReader(str(path))
+    assert len(reader) == 9
+    for (timestamp, landmarks, handedness), read in zip(written, reader):
+        assert read[0] == timestamp
+        np.testing.assert_array_equal(read[1], landmarks)
+
+
+def testHeaderOnlyWithPartialRecord(tmp_path):
+    path = tmp_path / "session.hlm"
+    with LandmarkRecorder(str(path)) as recorder:
+        recorder.write(0.0, hm.landmarksToArray(None), [])
+    path.write_bytes(path.read_bytes()[:-1])
+
+    assert len(LandmarkReader(str(path))) == 0
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+import handModule as hm
+import replay as rp
+from scheduler import AdaptiveScheduler
+
+
+HAND = np.zeros((hm.NUM_LANDMARKS, 3), dtype=np.float32)
+HAND[:, :2] = 0.5 * (rp.OPEN_HAND - rp.OPEN_HAND.mean(axis=0)) + 0.5
+
+
+def results(landmarks):
+    # Mediapipe-shaped results for one right hand.
+    point = lambda x, y, z: SimpleNamespace(x = x, y = y, z = z)
+    return SimpleNamespace(
+        multi_hand_landmarks = [SimpleNamespace(landmark = [point(*lm) for lm in landmarks])],
+        multi_handedness = [SimpleNamespace(classification = [SimpleNamespace(label = "Right")])],
+    )
+
+
+class Smoothing():
+    # Lagging filter that remembers what it was given.
+    def __init__(self):
+        self.inputs = []
+        self.last = None
+
+    def __call__(self, landmarks, timestamp, keys = None):
+        self.inputs.append(landmarks.copy())
+        self.last = landmarks if self.last is None else 0.5 * (self.last + landmarks)
+        return self.last
+
+    def predict(self, dt):
+        return self.last
+
+
+def testExtrapolatedFramesAreFilteredOnce():
+    # A hand moving steadily: extrapolation from the raw landmarks is exact,
+    # extrapolating the filtered ones would lag and then be filtered again.
+    detector = hm.HandDetector(source = [])
+    detector.source = None
+    smoothing = Smoothing()
+    detector.setFilter(smoothing)
+
+    step = [0]
+    def hand():
+        ret = HAND.copy()
+        ret[:, 0] += 0.002 * step[0]
+        return ret
+    detector.process = lambda img: results(hand())
+
+    scheduler = AdaptiveScheduler(detector, motionThreshold = 0.01)
+    img = np.zeros((48, 64, 3), dtype=np.uint8)
+    for ind in range(60):
+        step[0] = ind
+        scheduler.findHands(img, draw = False)
+        np.testing.assert_allclose(smoothing.inputs[-1][0], hand(), atol = 1e-5)
+
+    assert scheduler.counts["extrapolated"] > 0
@@ -0,0 +1,104 @@
+import numpy as np
+
+import handModule as hm
+import replay as rp
+from tracking import HandTracker
+
+
+def hands(*centers):
+    # One small hand per (x, y) center.
+    ret = np.zeros((len(centers), hm.NUM_LANDMARKS, 3), dtype=np.float32)
+    for i, center in enumerate(centers):
+        ret[i, :, :2] = 0.5 * (rp.OPEN_HAND - rp.OPEN_HAND.mean(axis=0)) + center
+    return ret
+
+
+def testIdsFollowHandsWhenOrderSwaps():
+    tracker = HandTracker()
+    first, _ = tracker.update(hands((0.3, 0.5), (0.7, 0.5)), ["Right", "Left"])
+    swapped, _ = tracker.update(hands((0.7, 0.5), (0.3, 0.5)), ["Left", "Right"])
+
+    assert swapped.tolist() == first[::-1].tolist()
+
+
+def testIdsStableWhileMoving():
+    tracker = HandTracker()
+    ids = []
+    for ind in range(100):
+        x = 0.2 + 0.006 * ind
+        found, _ = tracker.update(hands((x, 0.3), (1 - x, 0.7)), ["Right", "Right"])
+        ids.append(found.tolist())
+
+    assert ids == [ids[0]] * 100
+    assert len(set(ids[0])) == 2
+
+
+def testShortDropOutKeepsId():
+    tracker = HandTracker(maxMissed = 5)
+    before, _ = tracker.update(hands((0.5, 0.5)), ["Right"])
+    for _ in range(5):
+        tracker.update(hands(), [])
+    after, _ = tracker.update(hands((0.52, 0.5)), ["Right"])
+
+    assert after.tolist() == before.tolist()
+
+
+def testLongDropOutGetsNewId():
+    tracker = HandTracker(maxMissed = 5)
+    before, _ = tracker.update(hands((0.5, 0.5)), ["Right"])
+    for _ in range(6):
+        tracker.update(hands(), [])
+    after, _ = tracker.update(hands((0.5, 0.5)), ["Right"])
+
+    assert after[0] != before[0]
+
+
+def testJumpGetsNewId():
+    tracker = HandTracker(maxDistance = 0.2)
+    before, _ = tracker.update(hands((0.2, 0.5)), ["Right"])
+    after, _ = tracker.update(hands((0.8, 0.5)), ["Right"])
+
+    assert after[0] != before[0]
+
+
+def testFlippedLabelKeepsIdIfHandBarelyMoved():
+    tracker = HandTracker()
+    before, _ = tracker.update(hands((0.5, 0.5)), ["Right"])
+    after, _ = tracker.update(hands((0.51, 0.5)), ["Left"])
+
+    assert after.tolist() == before.tolist()
+
+
+def testNewHandDoesNotTakeAnId():
+    tracker = HandTracker()
+    first, _ = tracker.update(hands((0.3, 0.5)), ["Right"])
+    both, _ = tracker.update(hands((0.7, 0.5), (0.31, 0.5)), ["Left", "Right"])
+
+    assert both[1] == first[0]
+    assert both[0] not in first
+
+
+def testTableGrows():
+    tracker = HandTracker(capacity = 2)
+    centers = [(0.1 + 0.2 * i, 0.5) for i in range(5)]
+    ids, rows = tracker.update(hands(*centers), ["Right"] * 5)
+    again, _ = tracker.update(hands(*centers), ["Right"] * 5)
+
+    assert len(set(ids.tolist())) == 5
+    assert len(tracker.table) >= 5
+    assert again.tolist() == ids.tolist()
+
+
+def testDetectorOrdersHandsById():
+    detector = hm.HandDetector(source = [])
+    a, b = hands((0.3, 0.5), (0.7, 0.5))
+
+    detector.setLandmarks(np.stack((a, b)), ["Right", "Left"])
+    ids = detector.handIds.tolist()
+    detector.setLandmarks(np.stack((b, a)), ["Left", "Right"])
+
+    assert detector.handIds.tolist() == ids
+    np.testing.assert_array_equal(detector.landmarks, np.stack((a, b)))
+    assert detector.handedness == ["Right", "Left"]
+    assert detector.handIndex(ids[1]) == 1
+    assert detector.handIndex(-5) is None
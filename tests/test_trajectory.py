@@ -0,0 +1,166 @@
+import math
+
+import numpy as np
+import pytest
+
+import handModule as hm
+import replay as rp
+from trajectory import TrajectoryRecognizer
+
+
+FPS = 30
+
+# Small open hand centered on (0, 0), moved along the paths below.
+HAND = np.zeros((hm.NUM_LANDMARKS, 3), dtype=np.float32)
+HAND[:, :2] = 0.5 * (rp.OPEN_HAND - rp.OPEN_HAND.mean(axis=0))
+
+
+def run(path, fps = FPS, recognizer = None):
+    # Feeds one hand along path, returns (frame, kind, direction) of every gesture.
+    recognizer = recognizer or TrajectoryRecognizer()
+    ret = []
+    for ind, position in enumerate(path):
+        landmarks = HAND.copy()
+        landmarks[:, :2] += position
+        for gesture in recognizer.update(landmarks[None], ["Right"], ind / fps, [0]):
+            ret.append((ind, gesture.kind, gesture.direction))
+    return ret
+
+
+def still(position, frames = 30):
+    return [position] * frames
+
+
+def swipe(start, end, frames = 10):
+    # Eases in and out like a real hand.
+    ease = (1 - np.cos(np.pi * np.arange(frames + 1) / frames)) / 2
+    return [tuple(np.add(start, np.multiply(np.subtract(end, start), e))) for e in ease]
+
+
+def circle(framesPerTurn, radius = 0.15, turns = 1.2, sign = 1):
+    angles = 2 * math.pi * np.arange(int(framesPerTurn * turns)) / framesPerTurn
+    return [(0.5 + radius * math.cos(a), 0.5 + sign * radius * math.sin(a)) for a in angles]
+
+
+def kinds(gestures, kind):
+    return [g for g in gestures if g[1] == kind]
+
+
+def testSwipeIsReportedOnce():
+    path = swipe((0.3, 0.5), (0.7, 0.5))
+    gestures = run(still(path[0]) + path + still(path[-1]))
+
+    assert [g[1:] for g in kinds(gestures, "swipe")] == [("swipe", hm.swipeRegion(1, 0, 1, 1))]
+
+
+def testSwipeBackAfterRest():
+    there = swipe((0.3, 0.5), (0.7, 0.5))
+    back = there[::-1]
+    gestures = run(still(there[0]) + there + still(there[-1], 20) + back + still(back[-1], 10))
+
+    assert [g[2] for g in kinds(gestures, "swipe")] == [hm.swipeRegion(1, 0, 1, 1), hm.swipeRegion(-1, 0, 1, 1)]
+
+
+def testVerticalSwipe():
+    path = swipe((0.5, 0.2), (0.5, 0.7))
+    gestures = run(still(path[0]) + path + still(path[-1]))
+
+    assert [g[2] for g in kinds(gestures, "swipe")] == [hm.swipeRegion(0, 1, 1, 1)]
+
+
+def testSlowMotionIsNoSwipe():
+    path = swipe((0.3, 0.5), (0.7, 0.5), frames = 60)
+
+    assert kinds(run(still(path[0]) + path + still(path[-1])), "swipe") == []
+
+
+@pytest.mark.parametrize("framesPerTurn", [20, 25, 30, 60, 90])
+@pytest.mark.parametrize("radius", [0.1, 0.2, 0.3])
+def testCircle(framesPerTurn, radius):
+    # Fast circles must not start with a swipe, slow ones must still fit the window.
+    path = circle(framesPerTurn, radius)
+    gestures = run(still(path[0]) + path)
+
+    assert kinds(gestures, "swipe") == []
+    assert [g[1] for g in gestures if g[1] != "hold"] == ["circle"]
+
+
+def testCircleDirection():
+    clockwise = run(still(circle(30)[0]) + circle(30))
+    counter = run(still(circle(30, sign = -1)[0]) + circle(30, sign = -1))
+
+    assert [g[2] for g in kinds(clockwise, "circle")] == ["Clockwise"]
+    assert [g[2] for g in kinds(counter, "circle")] == ["Counterclockwise"]
+
+
+def testSlowCircleAtHigherFrameRate():
+    path = circle(120)
+    gestures = run(still(path[0], 60) + path, fps = 60)
+
+    assert len(kinds(gestures, "circle")) == 1
+
+
+def testJitterIsNoGesture():
+    rng = np.random.default_rng(0)
+    path = [tuple(0.5 + rng.normal(0, 0.003, 2)) for _ in range(600)]
+
+    assert [g for g in run(path) if g[1] != "hold"] == []
+
+
+def testHold():
+    gestures = run(still((0.5, 0.5), 60))
+
+    assert [g[1] for g in gestures] == ["hold"]
+
+
+def testPinchDragIsReportedOnce():
+    # Thumb tip on the index tip, the other fingers up, dragged to the left.
+    pinched = HAND.copy()
+    pinched[4] = pinched[8]
+    recognizer = TrajectoryRecognizer(holdTime = math.inf)
+
+    gestures = []
+    for ind, position in enumerate(still((0.6, 0.5), 5) + swipe((0.6, 0.5), (0.5, 0.5), 20)):
+        landmarks = pinched.copy()
+        landmarks[:, :2] += position
+        gestures += recognizer.update(landmarks[None], ["Right"], ind / FPS, [0])
+
+    assert [(g.kind, g.direction) for g in gestures] == [("pinchDrag", hm.swipeRegion(-1, 0, 1, 1))]
+
+
+def testMovingFistIsNoPinchDrag():
+    # The fingertips of a fist are close together too.
+    recognizer = TrajectoryRecognizer()
+    gestures = []
+    for ind, (landmarks, handedness) in enumerate(rp.syntheticHands(240, period = 30)):
+        gestures += recognizer.update(landmarks, handedness, ind / FPS, [0])
+
+    assert [g for g in gestures if g.kind == "pinchDrag"] == []
+
+
+def testStateFollowsHandIds():
+    # Two right hands listed in a different order every frame, both still.
+    recognizer = TrajectoryRecognizer()
+    left = HAND.copy()
+    left[:, :2] += (0.3, 0.5)
+    right = HAND.copy()
+    right[:, :2] += (0.7, 0.5)
+
+    gestures = []
+    for ind in range(60):
+        if ind % 2:
+            landmarks, ids = np.stack((right, left)), [1, 0]
+        else:
+            landmarks, ids = np.stack((left, right)), [0, 1]
+        gestures += recognizer.update(landmarks, ["Right", "Right"], ind / FPS, ids)
+
+    assert sorted(recognizer.hands) == [0, 1]
+    assert [g.kind for g in gestures] == ["hold", "hold"]
+
+
+def testHandThatLeftIsForgotten():
+    recognizer = TrajectoryRecognizer()
+    run(still((0.5, 0.5), 5), recognizer = recognizer)
+    recognizer.update(np.empty((0, hm.NUM_LANDMARKS, 3), dtype=np.float32), [], 1.0)
+
+    assert recognizer.hands == {}
@@ -0,0 +1,106 @@
+import numpy as np
+
+
+# One row per tracked hand. id is -1 for a free row, grabPos is the pixel
+# center of mass where the current grab started (see swipeDirection()).
+TRACK_DTYPE = np.dtype([
+    ("id", "<i8"),
+    ("label", "<U8"),
+    ("centroid", "<f8", 2),
+    ("missed", "<i4"),
+    ("grabbed", "?"),
+    ("grabPos", "<f8", 2),
+])
+
+
+class HandTracker():
+    """HandTracker()
+
+    Gives every hand an ID that stays the same across frames, by matching
+    the hands to the previous frame's ones with their handedness and the
+    nearest centroid. Per hand state lives in a small structured array
+    (self.table), one row per ID.
+
+    Args:
+        capacity:       initial rows of the table, it grows when needed
+        maxDistance:    max normalized centroid move between frames that keeps an ID
+        labelPenalty:   added to the distance when the handedness differs, so a
+                        flipped label only keeps its ID if the hand barely moved
+        maxMissed:      frames a hand that left keeps its ID and state
+    """
+    def __init__(self, capacity = 4, maxDistance = 0.2, labelPenalty = 0.1, maxMissed = 5):
+        self.maxDistance = maxDistance
+        self.labelPenalty = labelPenalty
+        self.maxMissed = maxMissed
+
+        self.table = np.zeros(capacity, dtype=TRACK_DTYPE)
+        self.table["id"] = -1
+        self.nextId = 0
+
+    def reset(self):
+        self.table["id"] = -1
+        self.table["grabbed"] = False
+
+    def update(self, landmarks, handedness):
+        """update()
+
+        Args:
+            landmarks:  (hands, 21, 3) normalized landmarks of one frame
+            handedness: labels of the hands
+        Returns:
+            tuple: (ids, rows) int arrays, the ID and table row of each hand
+        """
+        hands = len(landmarks)
+        rows = np.full(hands, -1, dtype=np.intp)
+        centroids = landmarks[:, :, :2].mean(axis=1) if hands else np.empty((0, 2))
+        labels = np.array(handedness, dtype=TRACK_DTYPE["label"]).reshape(hands)
+
+        table = self.table
+        live = np.flatnonzero(table["id"] >= 0)
+
+        if hands and len(live):
+            # Every hand against every tracked ID at once.
+            cost = np.linalg.norm(centroids[:, None] - table["centroid"][live][None], axis=2)
+            cost += self.labelPenalty * (labels[:, None] != table["label"][live][None])
+
+            # Greedy on the cheapest pairs first, there are only a few hands.
+            taken = np.zeros(len(live), dtype=bool)
+            for flat in np.argsort(cost, axis=None):
+                i, j = divmod(int(flat), len(live))
+                if cost[i, j] > self.maxDistance:
+                    break
+                if rows[i] < 0 and not taken[j]:
+                    rows[i] = live[j]
+                    taken[j] = True
+
+        seen = np.zeros(len(table), dtype=bool)
+        seen[rows[rows >= 0]] = True
+
+        # IDs not seen for too long are dropped with their state.
+        lost = (table["id"] >= 0) & ~seen
+        table["missed"][lost] += 1
+        table["missed"][seen] = 0
+        table["id"][lost & (table["missed"] > self.maxMissed)] = -1
+
+        for i in np.flatnonzero(rows < 0):
+            rows[i] = self._add()
+
+        table = self.table
+        table["centroid"][rows] = centroids
+        table["label"][rows] = labels
+
+        return table["id"][rows], rows
+
+    def _add(self):
+        free = np.flatnonzero(self.table["id"] < 0)
+        if len(free) == 0:
+            grown = np.zeros(len(self.table), dtype=TRACK_DTYPE)
+            grown["id"] = -1
+            free = [len(self.table)]
+            self.table = np.concatenate((self.table, grown))
+
+        row = free[0]
+        self.table[row] = (self.nextId, "", (0, 0), 0, False, (0, 0))
+        self.nextId += 1
+
+        return row
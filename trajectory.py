@@ -0,0 +1,380 @@
+import math
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+import handModule as hm
+
+
+# kind is "swipe", "circle", "pinchDrag" or "hold". direction is "Up" / "Down" /
+# "Left" / "Right" for swipe and pinchDrag, mirrored like swipeDirection();
+# "Clockwise" / "Counterclockwise" for circle, as seen on screen (not mirrored);
+# None for hold. velocity is in normalized image units per second.
+Gesture = namedtuple("Gesture", "timestamp hand kind direction velocity confidence")
+
+# The path is measured in steps of at least this length, so jitter around a
+# still position doesn't add up to path length or turning.
+MIN_STEP = 0.01
+
+
+class HandTrajectory():
+    """HandTrajectory()
+
+    Ring buffer of one hand's centroid and landmark history over the last
+    window seconds, so slow gestures fit at any frame rate. Path length and
+    total turning angle are kept as running sums over the whole window and
+    over the current motion (since the hand last moved slower than
+    restSpeed, at most motionTime seconds), so push() and every query are
+    O(1) per frame, amortized.
+
+    Args:
+        window:     seconds kept
+        motionTime: max seconds of the current motion
+        restSpeed:  speed below which the hand rests and the motion restarts
+        capacity:   initial frames kept, it grows when the window needs more
+    """
+    def __init__(self, window = 3.0, motionTime = 0.5, restSpeed = 0.5, capacity = 64):
+        self.window = window
+        self.motionTime = motionTime
+        self.restSpeed = restSpeed
+
+        self.times = np.zeros(capacity)
+        self.centroids = np.zeros((capacity, 2))
+        self.landmarks = np.zeros((capacity, hm.NUM_LANDMARKS, 3), dtype=np.float32)
+
+        # Length of the path step ending at each entry (0 if the hand is still
+        # within MIN_STEP of the last one) and the turn it makes.
+        self.segments = np.zeros(capacity)
+        self.turns = np.zeros(capacity)
+
+        self.clear()
+
+        # Per hand gesture state.
+        self.swiping = False
+        self.lastSwipe = None
+        self.pinchStart = None
+        self.dragged = False
+        self.holdStart = None
+        self.holdFired = False
+
+    def clear(self):
+        self.count = 0
+        self.head = 0
+        self.pathLength = 0.0
+        self.turnSum = 0.0
+        self.anchor = None
+        self.lastStep = None
+
+        # Same sums over the current motion, its first turn is left out as it
+        # is measured against a step made at rest.
+        self.motionCount = 0
+        self.motionPath = 0.0
+        self.motionTurn = 0.0
+        self.rested = False
+
+    def push(self, timestamp, centroid, landmarks):
+        size = len(self.times)
+
+        # Entries older than the window, the one after each evicted entry
+        # becomes the oldest and its step comes from outside the window now.
+        while self.count and self.times[self.oldest()] < timestamp - self.window:
+            self.count -= 1
+            self.motionCount = min(self.motionCount, self.count)
+            if self.count:
+                nxt = self.oldest()
+                self.pathLength -= self.segments[nxt]
+                self.turnSum -= self.turns[nxt]
+        if self.count == 0:
+            self.clear()
+
+        if self.count == size:
+            self._grow()
+            size = len(self.times)
+        ind = self.head
+
+        segment = 0.0
+        turn = 0.0
+        moved = 0.0
+        dt = 0.0
+        if self.count:
+            prev = (ind - 1) % size
+            moved = math.hypot(*(centroid - self.centroids[prev]))
+            dt = timestamp - self.times[prev]
+
+            step = centroid - self.anchor
+            if math.hypot(step[0], step[1]) > MIN_STEP:
+                segment = math.hypot(step[0], step[1])
+                if self.lastStep is not None:
+                    last = self.lastStep
+                    turn = math.atan2(last[0] * step[1] - last[1] * step[0], last[0] * step[0] + last[1] * step[1])
+                self.lastStep = step
+                self.anchor = centroid.copy()
+        else:
+            self.anchor = centroid.copy()
+
+        self.times[ind] = timestamp
+        self.centroids[ind] = centroid
+        self.landmarks[ind] = landmarks
+        self.segments[ind] = segment
+        self.turns[ind] = turn
+
+        self.pathLength += segment
+        self.turnSum += turn
+        self.head = (ind + 1) % size
+        self.count += 1
+
+        # A slow step ends the motion, the next one starts here.
+        self.rested = self.count > 1 and (dt <= 0 or moved / dt < self.restSpeed)
+        if self.rested or self.motionCount == 0:
+            self.motionCount = 1
+            self.motionPath = 0.0
+            self.motionTurn = 0.0
+        else:
+            self.motionCount += 1
+            self.motionPath += segment
+            if self.motionCount > 2:
+                self.motionTurn += turn
+
+        while self.motionCount > 1 and self.times[self.motionStart()] < timestamp - self.motionTime:
+            self.motionCount -= 1
+            first = self.motionStart()
+            self.motionPath -= self.segments[first]
+            if self.motionCount > 1:
+                self.motionTurn -= self.turns[(first + 1) % size]
+
+    def _grow(self):
+        # Unroll the ring, oldest first, into arrays twice the size.
+        order = (self.oldest() + np.arange(self.count)) % len(self.times)
+        for name in ("times", "centroids", "landmarks", "segments", "turns"):
+            old = getattr(self, name)
+            grown = np.zeros((2 * len(old),) + old.shape[1:], dtype=old.dtype)
+            grown[:self.count] = old[order]
+            setattr(self, name, grown)
+        self.head = self.count
+
+    def newest(self):
+        return (self.head - 1) % len(self.times)
+
+    def oldest(self):
+        return (self.head - self.count) % len(self.times)
+
+    def motionStart(self):
+        return (self.head - self.motionCount) % len(self.times)
+
+    def speed(self):
+        """Speed of the last step, in normalized units per second."""
+        if self.count < 2:
+            return 0.0
+
+        n = self.newest()
+        prev = (n - 1) % len(self.times)
+        dt = self.times[n] - self.times[prev]
+        return math.hypot(*(self.centroids[n] - self.centroids[prev])) / dt if dt > 0 else 0.0
+
+    def history(self):
+        """history()
+
+        Returns:
+            tuple: (times, centroids, landmarks) of the window, oldest first
+        """
+        order = (self.oldest() + np.arange(self.count)) % len(self.times)
+        return self.times[order], self.centroids[order], self.landmarks[order]
+
+
+class TrajectoryRecognizer():
+    """TrajectoryRecognizer()
+
+    Recognizes swipes, circles, pinch-drags and holds from the path of each
+    hand, instead of comparing only the grab and release positions like
+    swipeDirection(). Works in normalized coordinates, so it's the same for
+    live frames and recorded landmarks at any resolution.
+
+    Args:
+        window:         seconds of history per hand, the slowest circle takes this long
+        swipeTime:      max duration of a swipe
+        swipeSpeed:     minimum average swipe speed (normalized units per second)
+        minSwipe:       minimum swipe distance
+        straightness:   minimum ratio of swipe distance to path length
+        swipeTurn:      max average turning of a swipe (radians per second), faster
+                        turning is a circle in progress
+        swipeGap:       minimum seconds between two swipes of a hand
+        circleMinPath:  minimum path length of a circle
+        pinchRatio:     thumb-index distance, relative to the hand size, counted as a pinch
+                        while the middle, ring and pinky fingers are up
+        dragMin:        distance a pinch has to move to count as a drag, reported
+                        once per pinch
+        holdSpeed:      maximum speed of a held hand
+        holdTime:       seconds a hand has to stay still for a hold
+    """
+    def __init__(self, window = 3.0, swipeTime = 0.5, swipeSpeed = 1.0, minSwipe = 0.15, straightness = 0.8,
+                 swipeTurn = math.pi, swipeGap = 0.3, circleMinPath = 0.3, pinchRatio = 0.35, dragMin = 0.02,
+                 holdSpeed = 0.05, holdTime = 0.8):
+        self.window = window
+        self.swipeTime = swipeTime
+        self.swipeSpeed = swipeSpeed
+        self.minSwipe = minSwipe
+        self.straightness = straightness
+        self.swipeTurn = swipeTurn
+        self.swipeGap = swipeGap
+        self.circleMinPath = circleMinPath
+        self.pinchRatio = pinchRatio
+        self.dragMin = dragMin
+        self.holdSpeed = holdSpeed
+        self.holdTime = holdTime
+
+        self.hands = {}
+
+    def update(self, landmarks, handedness, timestamp, ids = None):
+        """update()
+
+        Args:
+            landmarks:  (hands, 21, 3) normalized landmarks of one frame
+            handedness: labels of the hands
+            timestamp:  frame time in seconds
+            ids:        persistent hand IDs (HandDetector.handIds) the history
+                        is kept by, by default hands are told apart by handedness
+        Returns:
+            list: Gestures recognized on this frame
+        """
+        ret = []
+        seen = set()
+        keys = set()
+
+        # A pinch needs the other fingers up, or a fist would pinch too.
+        fingersUp = hm.evaluateGestures(landmarks)["fingersUp"] if len(handedness) else None
+
+        for i, label in enumerate(handedness):
+            # Same keys as HandDetector.gestures().
+            key = label if label not in keys else label + str(i)
+            keys.add(key)
+
+            handId = key if ids is None else int(ids[i])
+            seen.add(handId)
+
+            traj = self.hands.get(handId)
+            if traj is None:
+                traj = self.hands[handId] = HandTrajectory(self.window, self.swipeTime, 0.5 * self.swipeSpeed)
+
+            hand = landmarks[i]
+            centroid = hand[:, :2].mean(axis=0).astype(np.float64)
+            traj.push(timestamp, centroid, hand)
+
+            ret.extend(self._check(key, traj, hand, fingersUp[i], timestamp))
+
+        # Hands that left the frame.
+        for handId in list(self.hands):
+            if handId not in seen:
+                del self.hands[handId]
+
+        return ret
+
+    def updateFrom(self, detector, timestamp):
+        """updateFrom()
+
+        update() with the landmarks and hand IDs of a HandDetector's current frame.
+        """
+        return self.update(detector.landmarks, detector.handedness, timestamp, detector.handIds)
+
+    def _check(self, key, traj, hand, fingersUp, timestamp):
+        ret = []
+        n, o, m = traj.newest(), traj.oldest(), traj.motionStart()
+        speed = traj.speed()
+
+        # A swipe is reported once, until the motion ends and starts over.
+        if traj.swiping and traj.rested:
+            traj.swiping = False
+
+        # Swipe: fast, straight and not turning over the current motion.
+        dt = traj.times[n] - traj.times[m]
+        net = traj.centroids[n] - traj.centroids[m]
+        dist = math.hypot(net[0], net[1])
+        gap = traj.lastSwipe is None or timestamp - traj.lastSwipe >= self.swipeGap
+
+        if (not traj.swiping and gap and dt > 0 and dist >= self.minSwipe and dist / dt >= self.swipeSpeed
+                and dist >= self.straightness * traj.motionPath and abs(traj.motionTurn) <= self.swipeTurn * dt):
+            velocity = float(dist / dt)
+            straight = (dist / traj.motionPath - self.straightness) / (1 - self.straightness) if traj.motionPath else 1.0
+            confidence = float(min(1.0, 0.5 * straight + 0.5 * min(1.0, velocity / (2 * self.swipeSpeed))))
+            ret.append(Gesture(timestamp, key, "swipe", hm.swipeRegion(net[0], net[1], 1, 1), velocity, confidence))
+            traj.swiping = True
+            traj.lastSwipe = timestamp
+            self._restart(traj, hand)
+
+        # Circle: a full turn over a long enough path, ending near its start.
+        elif abs(traj.turnSum) >= 2 * math.pi and traj.pathLength >= self.circleMinPath:
+            dt = traj.times[n] - traj.times[o]
+            net = traj.centroids[n] - traj.centroids[o]
+            direction = "Clockwise" if traj.turnSum > 0 else "Counterclockwise"
+            confidence = max(0.0, 1.0 - math.hypot(net[0], net[1]) * math.pi / traj.pathLength)
+            ret.append(Gesture(timestamp, key, "circle", direction, traj.pathLength / dt if dt > 0 else 0.0, confidence))
+            self._restart(traj, hand)
+
+        # Pinch-drag: thumb and index tips together, the other fingers up, while
+        # the hand moves. Reported once, until the pinch is released.
+        n = traj.newest()
+        size = np.linalg.norm(hand[9, :2] - hand[0, :2])
+        pinch = np.linalg.norm(hand[4, :2] - hand[8, :2])
+        centroid = traj.centroids[n]
+        if size > 0 and pinch < self.pinchRatio * size and fingersUp[2:].all():
+            if traj.pinchStart is None:
+                traj.pinchStart = centroid.copy()
+            elif not traj.dragged:
+                delta = centroid - traj.pinchStart
+                if math.hypot(delta[0], delta[1]) >= self.dragMin:
+                    traj.dragged = True
+                    confidence = float(1.0 - pinch / (self.pinchRatio * size))
+                    ret.append(Gesture(timestamp, key, "pinchDrag", hm.swipeRegion(delta[0], delta[1], 1, 1), speed, confidence))
+        else:
+            traj.pinchStart = None
+            traj.dragged = False
+
+        # Hold: still for holdTime seconds, reported once.
+        if traj.count > 1 and speed < self.holdSpeed:
+            if traj.holdStart is None:
+                traj.holdStart = timestamp
+            elif timestamp - traj.holdStart >= self.holdTime and not traj.holdFired:
+                traj.holdFired = True
+                ret.append(Gesture(timestamp, key, "hold", None, speed, 1.0 - speed / self.holdSpeed))
+        else:
+            traj.holdStart = None
+            traj.holdFired = False
+
+        return ret
+
+    def _restart(self, traj, hand):
+        # The next gesture starts from the current position.
+        n = traj.newest()
+        timestamp, centroid = traj.times[n], traj.centroids[n].copy()
+        traj.clear()
+        traj.push(timestamp, centroid, hand)
+
+
+def recognizeRecording(path, **kwargs):
+    """recognizeRecording()
+
+    Runs a TrajectoryRecognizer over a recording.LandmarkRecorder file.
+
+    Args:
+        path:   recording to read
+        kwargs: passed on to TrajectoryRecognizer()
+    Returns:
+        list: every Gesture in the recording
+    """
+    from recording import LandmarkReader
+
+    recognizer = TrajectoryRecognizer(**kwargs)
+    ret = []
+    for timestamp, landmarks, handedness in LandmarkReader(path):
+        ret.extend(recognizer.update(landmarks, handedness, timestamp))
+
+    return ret
+
+
+def main():
+    for path in sys.argv[1:]:
+        for gesture in recognizeRecording(path):
+            print("%.3f %s %s %s (%.2f/s, %.2f)" % (gesture.timestamp, gesture.hand, gesture.kind, gesture.direction, gesture.velocity, gesture.confidence))
+
+if __name__ == "__main__":
+    main()